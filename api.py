@@ -1,21 +1,33 @@
+import asyncio
+import base64
+import json
 import mimetypes
 import os
 import uuid
-import psycopg2
-from typing import List
-from fastapi import Depends, FastAPI, File, Form, Response, UploadFile, HTTPException
+import time
+from typing import List, Optional
+from fastapi import BackgroundTasks, Depends, FastAPI, File, Form, Header, Query, UploadFile, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from psycopg2.extras import RealDictCursor
 from sqlalchemy.orm import Session
-from matcher import ResumeMatcherCore
+from matcher import ensure_analysis_schema, get_matcher
+from groq_llm import close_clients
+from blob_store import blob_store
+from cache_store import sha256_text
+from extraction import extraction_stage
+from vector_index import embed_query, index_resume_texts, resume_index
 import models
 import schemas
-from database import engine,get_db as getdb
+import jobs
+from database import engine,get_db as getdb,insert_ignoring_conflicts,pool_status,raw_connection
 
 
-models.Base.metadata.create_all(bind=engine)
+models.ensure_schema(engine)
+ensure_analysis_schema()
 
 app = FastAPI()
 
@@ -27,6 +39,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def shutdown_llm_clients():
+    await close_clients()
+    extraction_stage.shutdown()
+
 class ResumeScore(BaseModel):
     name: str
     email: str
@@ -39,37 +56,106 @@ class ResumeScore(BaseModel):
     certifications_score: float
 
 def get_db():
-    conn = psycopg2.connect(
-        dbname="Resume_JD",
-        user="postgres",
-        password="admin",
-        host="localhost",
-        port=5433,
-        cursor_factory=RealDictCursor
-    )
-    try:
+    with raw_connection() as conn:
         yield conn
-    finally:
-        conn.close()
 
-@app.get("/scores", response_model=List[ResumeScore])
-def get_scores(conn=Depends(get_db)):
+SCORE_COLUMNS = (
+    "id", "jd_uuid", "name", "email", "contact_no", "final_score",
+    "technical_skills_score", "technical_skills", "experience_score", "experience",
+    "education_score", "education", "soft_skills_score", "soft_skills",
+    "certifications_score", "certifications", "strengths", "weaknesses", "suggestions",
+)
+DEFAULT_SCORE_FIELDS = (
+    "id", "jd_uuid", "name", "email", "contact_no", "final_score", "technical_skills_score",
+    "experience_score", "education_score", "soft_skills_score", "certifications_score",
+)
+SCORES_MAX_LIMIT = 500
+
+def encode_score_cursor(row):
+    key = [row["final_score"], str(row["id"]), row["jd_uuid"] or ""]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_score_cursor(cursor):
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT name, email, contact_no, final_score, 
-                       technical_skills_score, experience_score,
-                       education_score, soft_skills_score, certifications_score
-                FROM resume_analysis;
-            """)
-            return cursor.fetchall()
+        final_score, record_id, jd_uuid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(final_score), str(record_id), str(jd_uuid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/scores")
+def get_scores(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    order: str = "desc",
+    jd_uuid: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    skill: Optional[List[str]] = Query(None),
+    fields: Optional[str] = None,
+    conn=Depends(get_db)
+):
+    """One page of evaluations sorted by ``final_score``.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    ``fields`` is a comma-separated subset of SCORE_COLUMNS; ``skill`` may be
+    repeated and matches against the matched technical skills. Rows without
+    an id or a score cannot be paged by key and are left out.
+    """
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    limit = max(1, min(limit, SCORES_MAX_LIMIT))
+
+    columns = [c.strip() for c in fields.split(",") if c.strip()] if fields else list(DEFAULT_SCORE_FIELDS)
+    unknown = [c for c in columns if c not in SCORE_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail={"error": "Unknown fields", "fields": unknown})
+    # The sort key is always returned so the cursor can be built
+    columns = ["id", "final_score", "jd_uuid"] + [c for c in columns if c not in ("id", "final_score", "jd_uuid")]
+
+    where, params = ["final_score IS NOT NULL", "id IS NOT NULL"], []
+    if jd_uuid is not None:
+        where.append("jd_uuid = %s")
+        params.append(jd_uuid)
+    if min_score is not None:
+        where.append("final_score >= %s")
+        params.append(min_score)
+    if max_score is not None:
+        where.append("final_score <= %s")
+        params.append(max_score)
+    for name in skill or []:
+        where.append("technical_skills ILIKE %s")
+        params.append("%" + name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    # A resume has one row per JD, so jd_uuid breaks ties between them. Rows
+    # without a JD sort as '' (before any uuid), hence the NULLS placement.
+    if cursor:
+        comparison = "<" if order == "desc" else ">"
+        where.append(f"(final_score, id, COALESCE(jd_uuid, '')) {comparison} (%s, %s::uuid, %s)")
+        params.extend(decode_score_cursor(cursor))
+
+    direction = "DESC" if order == "desc" else "ASC"
+    nulls = "NULLS LAST" if order == "desc" else "NULLS FIRST"
+    query = (
+        f"SELECT {', '.join(columns)} FROM resume_analysis"
+        + f" WHERE {' AND '.join(where)}"
+        + f" ORDER BY final_score {direction}, id {direction}, jd_uuid {direction} {nulls} LIMIT %s;"
+    )
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as db_cursor:
+            db_cursor.execute(query, params + [limit + 1])
+            rows = db_cursor.fetchall()
     except Exception as e:
-        return {"error": str(e)}
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+    items = rows[:limit]
+    return {
+        "items": jsonable_encoder(items),
+        "next_cursor": encode_score_cursor(items[-1]) if len(rows) > limit else None,
+    }
 
 @app.get("/scores/{name}", response_model=ResumeScore)
 def get_score_by_name(name: str, conn=Depends(get_db)):
     try:
-        with conn.cursor() as cursor:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
             cursor.execute("""
                 SELECT name, email, contact_no, final_score, 
                        technical_skills_score, experience_score,
@@ -83,6 +169,25 @@ def get_score_by_name(name: str, conn=Depends(get_db)):
             raise HTTPException(status_code=404, detail="Candidate not found")
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.get("/health/db")
+def database_health():
+    """Connection pool usage plus the round-trip time of a trivial query."""
+    status = pool_status()
+    try:
+        start = time.perf_counter()
+        with raw_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+        status["ping_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        status["ok"] = True
+    except Exception as e:
+        status["ok"] = False
+        status["error"] = str(e)
+        return JSONResponse(status_code=503, content=status)
+    return status
     
     
 # @app.post("/evaluate_batch")
@@ -113,89 +218,237 @@ def get_score_by_name(name: str, conn=Depends(get_db)):
 
 
 
+def write_upload(path, content):
+    # Write beside the target and swap it in, so a file already at the path
+    # (possibly a hard link shared with another name) is replaced, not rewritten
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+async def save_batch_uploads(jd, jd_uuid, resumes, resume_uuids):
+    """Write the JD and resumes under ./uploads and return ``(jd_path, [(resume_path, uuid), ...])``."""
+    os.makedirs("uploads", exist_ok=True)
+
+    # Save JD file
+    jd_path = f"./uploads/{jd_uuid}_{jd.filename}"
+    write_upload(jd_path, await jd.read())
+
+    # Save every resume first, then score them together on the worker pool
+    resume_items = []
+    for resume, uuid in zip(resumes, resume_uuids):
+        resume_path = f"./uploads/{uuid}_{resume.filename}"
+        write_upload(resume_path, await resume.read())
+        resume_items.append((resume_path, uuid))
+
+    return jd_path, resume_items
+
+def batch_entry(jd_uuid, resume_uuid, match_result):
+    return {
+        "jd_uuid": jd_uuid,
+        "resume_uuid": resume_uuid,
+        **{k: v for k, v in match_result.items() if k not in {"score"}}  # add optional metadata
+    }
+
 @app.post("/evaluate_batch")
 async def evaluate_batch(
     jd: UploadFile = File(...),
     jd_uuid: str = Form(...),
     resumes: List[UploadFile] = File(...),
-    resume_uuids: List[str] = Form(...)
+    resume_uuids: List[str] = Form(...),
+    top_k: Optional[int] = Form(None),
+    min_similarity: Optional[float] = Form(None)
 ):
-    matcher = ResumeMatcherCore()
-    os.makedirs("uploads", exist_ok=True)
+    matcher = get_matcher()
+    jd_path, resume_items = await save_batch_uploads(jd, jd_uuid, resumes, resume_uuids)
 
-    # Save JD file
-    jd_path = f"./uploads/{jd_uuid}_{jd.filename}"
-    with open(jd_path, "wb") as f:
-        f.write(await jd.read())
+    # run_batch blocks on LLM calls, so keep it off the event loop
+    match_results = await run_in_threadpool(
+        matcher.run_batch, jd_path, resume_items,
+        jd_uuid=jd_uuid, top_k=top_k, min_similarity=min_similarity
+    )
 
-    results = []
+    # Build clean response entries, in upload order
+    return [
+        batch_entry(jd_uuid, uuid, match_result)
+        for (_, uuid), match_result in zip(resume_items, match_results)
+    ]
 
-    # Evaluate each resume
-    for resume, uuid in zip(resumes, resume_uuids):
-        resume_path = f"./uploads/{resume.filename}"
-        with open(resume_path, "wb") as f:
-            f.write(await resume.read())
+@app.post("/evaluate_batch/stream")
+async def evaluate_batch_stream(
+    jd: UploadFile = File(...),
+    jd_uuid: str = Form(...),
+    resumes: List[UploadFile] = File(...),
+    resume_uuids: List[str] = Form(...),
+    format: str = Form("ndjson"),
+    top_k: Optional[int] = Form(None),
+    min_similarity: Optional[float] = Form(None)
+):
+    """Stream each resume's result as soon as it is scored, in completion order.
 
-        # Run the match
-        match_result = matcher.run_single(jd_path, resume_path, uuid)
+    ``format`` is ``ndjson`` (one JSON object per line) or ``sse`` (server-sent events).
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
 
-        # Build a clean response entry
-        results.append({
-            "jd_uuid": jd_uuid, 
-            "resume_uuid": uuid,
-            **{k: v for k, v in match_result.items() if k not in {"score"}}  # add optional metadata
-        })
+    matcher = get_matcher()
+    jd_path, resume_items = await save_batch_uploads(jd, jd_uuid, resumes, resume_uuids)
 
-    return results
+    # StreamingResponse iterates sync generators in the threadpool, so the
+    # blocking batch never runs on the event loop
+    def stream():
+        for (_, uuid), match_result in matcher.iter_batch(
+            jd_path, resume_items, jd_uuid=jd_uuid, top_k=top_k, min_similarity=min_similarity
+        ):
+            payload = json.dumps(batch_entry(jd_uuid, uuid, match_result), default=str)
+            if format == "sse":
+                yield f"event: result\ndata: {payload}\n\n"
+            else:
+                yield payload + "\n"
+        if format == "sse":
+            yield "event: done\ndata: {}\n\n"
 
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
 
 
 
 
-@app.get("/get_resume_delta/", )
-def get_score_by_name(conn=Depends(get_db)):
+
+DELTA_MAX_LIMIT = 1000
+DELTA_MAX_WAIT = 30
+DELTA_POLL_INTERVAL = float(os.getenv("DELTA_POLL_INTERVAL", "1"))
+DELTA_KEEPALIVE_SECONDS = 15
+
+def fetch_resume_changes(since, limit):
+    """Rows inserted or updated after change cursor ``since``, oldest change first."""
+    with raw_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(
+                "SELECT * FROM resume_analysis WHERE seq > %s ORDER BY seq LIMIT %s;", (since, limit)
+            )
+            return jsonable_encoder(cursor.fetchall())
+
+def get_all_resume_analysis():
     try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT * FROM resume_analysis;
-            """)
-            row = cursor.fetchall()
-            if row:
-                return row
-            raise HTTPException(status_code=404, detail="Candidate not found")
+        with raw_connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("""
+                    SELECT * FROM resume_analysis;
+                """)
+                row = cursor.fetchall()
+                if row:
+                    return jsonable_encoder(row)
+                raise HTTPException(status_code=404, detail="Candidate not found")
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/get_resume_delta/", )
+async def get_resume_delta(
+    since: Optional[int] = None,
+    limit: int = 200,
+    wait: float = 0,
+    format: str = "json",
+    last_event_id: Optional[str] = Header(None)
+):
+    """Evaluations changed since a cursor.
+
+    Without ``since`` this returns the whole table as before. With it, the
+    response is ``{items, next_cursor}``; start from ``since=0`` and pass
+    ``next_cursor`` on the next poll. ``wait`` (seconds) holds the request
+    open until something changes. ``format=sse`` streams changes as
+    server-sent events, resuming from ``Last-Event-ID`` on reconnect.
+    """
+    if format not in ("json", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'sse'")
+    if since is None and format == "json":
+        return await run_in_threadpool(get_all_resume_analysis)
+
+    limit = max(1, min(limit, DELTA_MAX_LIMIT))
+    if since is None:
+        since = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    if format == "sse":
+        async def stream():
+            cursor, idle = since, 0.0
+            while True:
+                rows = await run_in_threadpool(fetch_resume_changes, cursor, limit)
+                for row in rows:
+                    cursor = row["seq"]
+                    yield f"id: {cursor}\nevent: change\ndata: {json.dumps(row)}\n\n"
+                if rows:
+                    idle = 0.0
+                    continue
+                if idle >= DELTA_KEEPALIVE_SECONDS:
+                    yield ": keep-alive\n\n"
+                    idle = 0.0
+                await asyncio.sleep(DELTA_POLL_INTERVAL)
+                idle += DELTA_POLL_INTERVAL
+
+        return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    # Long-poll: the connection goes back to the pool between checks
+    deadline = time.monotonic() + max(0.0, min(wait, DELTA_MAX_WAIT))
+    while True:
+        rows = await run_in_threadpool(fetch_resume_changes, since, limit)
+        if rows or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(DELTA_POLL_INTERVAL)
+    return {"items": rows, "next_cursor": rows[-1]["seq"] if rows else since}
+
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 ALLOWED_CONTENT_TYPES = ["application/pdf"]
 
 @app.post("/pdf/upload/", response_model=List[schemas.PDFDocument])
 async def upload_multiple_pdfs(
+    background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
     uuids: List[str] = Form(...),
     db: Session = Depends(getdb)
 ):
-    uploaded_docs = []
+    rows = {}
+    extractions = {}
 
     for file, uuid in zip(files, uuids):
-        content = await file.read()
+        # Streamed to the blob store in chunks; only metadata goes in the table
+        content_hash, file_size = await run_in_threadpool(blob_store.put_stream, file.file)
         content_type = mimetypes.guess_type(file.filename)[0]
-        file_size = len(content)
 
-        db_pdf = models.PDFDocument(
+        # Parse in the background so later evaluations hit the text cache
+        extractions[uuid] = extraction_stage.submit_file(blob_store.path(content_hash), file.filename, content_hash)
+
+        rows.setdefault(uuid, dict(
             id=uuid,  # <-- set UUID from frontend
             filename=file.filename,
             content_type=content_type,
-            file_data=content,
+            content_hash=content_hash,
             file_size=file_size,
-        )
-        db.add(db_pdf)
+        ))
+
+    # One transaction for the whole upload; ids already stored are skipped
+    uploaded_docs = []
+    if rows:
+        uploaded_docs = db.scalars(
+            insert_ignoring_conflicts(models.PDFDocument, ["id"]).returning(models.PDFDocument),
+            list(rows.values()),
+        ).all()
         db.commit()
-        db.refresh(db_pdf)
-        uploaded_docs.append(db_pdf)
 
+    # Embed the new resumes into the search index once the response is sent
+    background_tasks.add_task(
+        index_uploaded_resumes, [(doc.id, extractions[doc.id]) for doc in uploaded_docs]
+    )
     return uploaded_docs
 
+def index_uploaded_resumes(extractions):
+    try:
+        index_resume_texts(
+            [uuid for uuid, _ in extractions],
+            [extraction_stage.result(future)["text"] for _, future in extractions],
+        )
+    except Exception as e:
+        print("Resume Indexing Error:", e)
+
 @app.post("/jd/upload/", response_model=List[schemas.JobDescription])
 async def upload_jds(
     files: List[UploadFile] = File(...),
@@ -203,29 +456,30 @@ async def upload_jds(
     titles: List[str] = Form(...),
     db: Session = Depends(getdb)
 ):
-    uploaded_jds = []
+    rows = {}
 
     for file, uuid, title in zip(files, uuids, titles):
-        content = await file.read()
+        content_hash, file_size = await run_in_threadpool(blob_store.put_stream, file.file)
         content_type = mimetypes.guess_type(file.filename)[0]
-        file_size = len(content)
 
-        # Skip if this JD is already uploaded
-        existing = db.query(models.JobDescription).filter_by(id=uuid).first()
-        if existing:
-            continue
+        extraction_stage.submit_file(blob_store.path(content_hash), file.filename, content_hash)
 
-        jd = models.JobDescription(
+        rows.setdefault(uuid, dict(
             id=uuid,
             title=title,
             content_type=content_type,
-            file_data=content,
+            content_hash=content_hash,
             file_size=file_size,
-        )
-        db.add(jd)
+        ))
+
+    # One transaction for the whole upload; JDs already uploaded are skipped
+    uploaded_jds = []
+    if rows:
+        uploaded_jds = db.scalars(
+            insert_ignoring_conflicts(models.JobDescription, ["id"]).returning(models.JobDescription),
+            list(rows.values()),
+        ).all()
         db.commit()
-        db.refresh(jd)
-        uploaded_jds.append(jd)
 
     return uploaded_jds
 
@@ -236,17 +490,41 @@ def get_pdf_metadata(pdf_id: int, db: Session = Depends(getdb)):
         raise HTTPException(status_code=404, detail="PDF document not found")
     return db_pdf
  
+@app.get("/pdf/{pdf_id}/profile")
+def get_resume_profile(pdf_id: str, db: Session = Depends(getdb)):
+    # Profiles are stored once per resume text, under the uuid that was
+    # evaluated first; re-uploads of the same file are found via their text
+    row = None
+    db_pdf = db.query(models.PDFDocument).filter(models.PDFDocument.id == pdf_id).first()
+    if db_pdf is not None and db_pdf.content_hash and blob_store.exists(db_pdf.content_hash):
+        record = extraction_stage.result(extraction_stage.submit_file(
+            blob_store.path(db_pdf.content_hash), db_pdf.filename, db_pdf.content_hash
+        ))
+        if record["text"]:
+            row = db.get(models.ResumeProfile, sha256_text(record["text"]))
+    if row is None:
+        row = (
+            db.query(models.ResumeProfile)
+            .filter(models.ResumeProfile.resume_uuid == pdf_id)
+            .order_by(models.ResumeProfile.created_at.desc())
+            .first()
+        )
+    if row is None:
+        raise HTTPException(status_code=404, detail="Resume profile not found")
+    return row.profile
+
 @app.get("/pdf/{pdf_id}/download")
 def download_pdf(pdf_id: str, db: Session = Depends(getdb)):
     db_pdf = db.query(models.PDFDocument).filter(models.PDFDocument.id == pdf_id).first()
     if db_pdf is None:
         raise HTTPException(status_code=404, detail="PDF document not found")
-    return Response(
-        content=db_pdf.file_data,
+    if not db_pdf.content_hash or not blob_store.exists(db_pdf.content_hash):
+        raise HTTPException(status_code=404, detail="PDF file not found")
+    # FileResponse streams from disk and answers Range requests
+    return FileResponse(
+        blob_store.path(db_pdf.content_hash),
         media_type=db_pdf.content_type,
-        headers={
-            "Content-Disposition": f"attachment; filename={db_pdf.filename}"
-        }
+        filename=db_pdf.filename,
     )
 
 
@@ -259,17 +537,42 @@ def get_jd_by_id(jd_id: str, db: Session = Depends(getdb)):
         raise HTTPException(status_code=404, detail="Job Description not found")
     return db_jd
 
+@app.get("/jd/{jd_id}/matches")
+def match_stored_resumes(jd_id: str, top_n: int = 20, db: Session = Depends(getdb)):
+    """Most similar resumes from the whole stored pool, by embedding similarity."""
+    db_jd = db.query(models.JobDescription).filter(models.JobDescription.id == jd_id).first()
+    if db_jd is None:
+        raise HTTPException(status_code=404, detail="Job Description not found")
+
+    if not db_jd.content_hash or not blob_store.exists(db_jd.content_hash):
+        raise HTTPException(status_code=404, detail="Job Description file not found")
+    extension = mimetypes.guess_extension(db_jd.content_type or "") or ".pdf"
+    jd_text = extraction_stage.result(extraction_stage.submit_file(
+        blob_store.path(db_jd.content_hash), f"{jd_id}{extension}", db_jd.content_hash
+    ))["text"]
+    matches = resume_index.search(embed_query(jd_text), top_n)
+
+    filenames = dict(
+        db.query(models.PDFDocument.id, models.PDFDocument.filename)
+        .filter(models.PDFDocument.id.in_([resume_uuid for resume_uuid, _ in matches]))
+        .all()
+    )
+    return [
+        {"resume_uuid": resume_uuid, "filename": filenames.get(resume_uuid), "similarity": similarity}
+        for resume_uuid, similarity in matches
+    ]
+
 @app.get("/jd/{jd_id}/download")
 def download_jd(jd_id: str, db: Session = Depends(getdb)):
     db_jd = db.query(models.JobDescription).filter(models.JobDescription.id == jd_id).first()
     if db_jd is None:
         raise HTTPException(status_code=404, detail="Job Description not found")
-    return Response(
-        content=db_jd.file_data,
+    if not db_jd.content_hash or not blob_store.exists(db_jd.content_hash):
+        raise HTTPException(status_code=404, detail="Job Description file not found")
+    return FileResponse(
+        blob_store.path(db_jd.content_hash),
         media_type=db_jd.content_type,
-        headers={
-            "Content-Disposition": f"attachment; filename={db_jd.title or jd_id}.pdf"
-        }
+        filename=f"{db_jd.title or jd_id}.pdf",
     )
 
 @app.get("/jds/", response_model=List[schemas.JobDescription])
@@ -280,26 +583,69 @@ def list_all_jds(db: Session = Depends(getdb)):
 
 @app.post("/logs/save/")
 def save_match_logs(logs: List[schemas.MatchLogEntry], db: Session = Depends(getdb)):
-    saved = []
-    for log in logs:
-        existing = db.query(models.MatchLog).filter_by(
-            jd_uuid=log.jd_uuid,
-            resume_uuid=log.resume_uuid
-        ).first()
-
-        if existing:
-            continue  # Skip duplicate log
-
-        entry = models.MatchLog(
-            jd_uuid=log.jd_uuid,
-            resume_uuid=log.resume_uuid,
-            resume_filename=log.filename,
-            score_data=log.score_data
-        )
-        db.add(entry)
-        db.commit()
-        db.refresh(entry)
-        saved.append(entry)
+    if not logs:
+        return {"saved": 0}
+
+    # One multi-row insert; logs for a (JD, resume) pair already saved are skipped
+    saved = db.scalars(
+        insert_ignoring_conflicts(models.MatchLog, ["jd_uuid", "resume_uuid"]).returning(models.MatchLog.id),
+        [
+            dict(
+                jd_uuid=log.jd_uuid,
+                resume_uuid=log.resume_uuid,
+                resume_filename=log.filename,
+                score_data=log.score_data
+            )
+            for log in logs
+        ],
+    ).all()
+    db.commit()
 
     return {"saved": len(saved)}
-    
\ No newline at end of file
+    
+
+
+@app.post("/jobs", response_model=schemas.EvaluationJob)
+def submit_evaluation_job(request: schemas.EvaluationJobCreate, db: Session = Depends(getdb)):
+    if not request.resume_uuids:
+        raise HTTPException(status_code=400, detail="resume_uuids must not be empty")
+    if db.query(models.JobDescription.id).filter(models.JobDescription.id == request.jd_uuid).first() is None:
+        raise HTTPException(status_code=404, detail="Job Description not found")
+
+    known = {
+        row.id for row in db.query(models.PDFDocument.id).filter(models.PDFDocument.id.in_(request.resume_uuids))
+    }
+    missing = [resume_uuid for resume_uuid in request.resume_uuids if resume_uuid not in known]
+    if missing:
+        raise HTTPException(status_code=404, detail={"error": "Resumes not found", "resume_uuids": missing})
+
+    job = jobs.create_job(db, request.jd_uuid, request.resume_uuids)
+    counts = jobs.job_counts(db, job.id)
+    return {
+        "id": job.id,
+        "jd_uuid": job.jd_uuid,
+        "status": jobs.job_status(counts),
+        "counts": counts,
+        "created_at": job.created_at,
+    }
+
+@app.get("/jobs/{job_id}", response_model=schemas.EvaluationJob)
+def get_evaluation_job(job_id: str, db: Session = Depends(getdb)):
+    job = db.get(models.EvaluationJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    counts = jobs.job_counts(db, job.id)
+    return {
+        "id": job.id,
+        "jd_uuid": job.jd_uuid,
+        "status": jobs.job_status(counts),
+        "counts": counts,
+        "created_at": job.created_at,
+    }
+
+@app.get("/jobs/{job_id}/items", response_model=List[schemas.EvaluationJobItem])
+def get_evaluation_job_items(job_id: str, status: str = None, db: Session = Depends(getdb)):
+    query = db.query(models.EvaluationJobItem).filter(models.EvaluationJobItem.job_id == job_id)
+    if status:
+        query = query.filter(models.EvaluationJobItem.status == status)
+    return query.order_by(models.EvaluationJobItem.position).all()
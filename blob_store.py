@@ -0,0 +1,67 @@
+import hashlib
+import os
+import tempfile
+
+# Uploaded documents live on disk, addressed by the SHA-256 of their bytes, so
+# identical uploads share one file and the tables only hold metadata.
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "blobs")
+BLOB_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    def __init__(self, root=BLOB_STORE_DIR):
+        self.root = root
+
+    def path(self, content_hash):
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+
+    def exists(self, content_hash):
+        return os.path.exists(self.path(content_hash))
+
+    def put_stream(self, stream):
+        """Copy a binary file object into the store; returns ``(content_hash, size)``."""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = stream.read(BLOB_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            content_hash = digest.hexdigest()
+            self._commit(tmp_path, content_hash)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return content_hash, size
+
+    def put_bytes(self, content):
+        content_hash = hashlib.sha256(content).hexdigest()
+        if not self.exists(content_hash):
+            os.makedirs(self.root, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            self._commit(tmp_path, content_hash)
+        return content_hash
+
+    def _commit(self, tmp_path, content_hash):
+        final_path = self.path(content_hash)
+        if os.path.exists(final_path):
+            os.remove(tmp_path)  # already stored: deduplicated
+            return
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+
+    def read_bytes(self, content_hash):
+        with open(self.path(content_hash), "rb") as f:
+            return f.read()
+
+
+blob_store = BlobStore()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+
+
+def sha256_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """Small persistent key/value store for JSON-serialisable values.
+
+    Values are zlib-compressed in a single SQLite table. Entries older than
+    ``max_age`` seconds are treated as misses, and once the table grows past
+    ``max_entries`` the least recently used rows are evicted.
+    """
+
+    def __init__(self, path, max_entries=None, max_age=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM entries WHERE key = ?;", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, created_at = row
+                if self.max_age is not None and now - created_at > self.max_age:
+                    conn.execute("DELETE FROM entries WHERE key = ?;", (key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?;", (now, key))
+                conn.commit()
+            return json.loads(zlib.decompress(value))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            print("Cache Read Error:", e)
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("""
+                    INSERT INTO entries (key, value, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (key) DO UPDATE SET
+                        value = excluded.value,
+                        created_at = excluded.created_at,
+                        accessed_at = excluded.accessed_at;
+                """, (key, blob, now, now))
+                self._evict(conn, now)
+                conn.commit()
+        except sqlite3.Error as e:
+            print("Cache Write Error:", e)
+
+    def _evict(self, conn, now):
+        if self.max_age is not None:
+            conn.execute("DELETE FROM entries WHERE created_at < ?;", (now - self.max_age,))
+        if self.max_entries is not None:
+            conn.execute("""
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                );
+            """, (self.max_entries,))
+
+
+# LLM evaluations keyed by evaluation_key(); a hit skips the provider call entirely.
+evaluation_cache = SQLiteCache(
+    os.getenv("EVAL_CACHE_PATH", os.path.join(CACHE_DIR, "evaluations.sqlite3")),
+    max_entries=int(os.getenv("EVAL_CACHE_MAX_ENTRIES", "50000")),
+    max_age=float(os.getenv("EVAL_CACHE_MAX_AGE_DAYS", "30")) * 86400,
+)
+
+
+def evaluation_key(jd_text, resume_text, model, temperature, prompt_hash):
+    parts = [sha256_text(jd_text), sha256_text(resume_text), model, repr(float(temperature)), prompt_hash]
+    return sha256_text("|".join(parts))
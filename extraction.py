@@ -0,0 +1,173 @@
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils import document_kind, parse_record, text_cache, text_cache_key, text_cache_key_for_hash
+
+# PDF/DOCX parsing is CPU-bound, so it runs in worker processes instead of on
+# the request thread. Results land in utils.text_cache, where extract_text and
+# every later evaluation pick them up.
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))
+EXTRACT_TASKS_PER_CHILD = int(os.getenv("EXTRACT_TASKS_PER_CHILD", "200"))
+# Documents caught in a pool that had to be recycled are resubmitted this often
+EXTRACT_RESUBMITS = 2
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _timed_out(timeout):
+    return {"text": "", "pages": 0, "seconds": timeout, "error": "extraction timed out"}
+
+
+def _parse_in_worker(content, kind, timeout):
+    # Workers run tasks on their main thread, so an interval timer can abort a
+    # pathological document without taking the whole pool down. It only fires
+    # between bytecodes, not inside PyMuPDF's C code, so this is a first line
+    # only; ExtractionStage.result enforces the timeout from the parent.
+    use_alarm = timeout and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return parse_record(content, kind)
+    except ExtractionTimeout:
+        return _timed_out(timeout)
+    except Exception as e:
+        return {"text": "", "pages": 0, "seconds": 0.0, "error": f"extraction failed: {e}"}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _parse_file_in_worker(path, kind, timeout):
+    with open(path, "rb") as f:
+        content = f.read()
+    return _parse_in_worker(content, kind, timeout)
+
+
+class ExtractionStage:
+    def __init__(self, max_workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=EXTRACT_TASKS_PER_CHILD,
+                )
+            return self._executor
+
+    def submit(self, content, filename):
+        """Queue a document for extraction; returns a Future resolving to its text record."""
+        kind = document_kind(filename)
+        key = text_cache_key(content, kind) if kind else None
+        return self._submit(kind, key, _parse_in_worker, content)
+
+    def submit_file(self, path, filename, content_hash):
+        """Like submit, for a stored file whose SHA-256 is known; only the path goes to the worker."""
+        kind = document_kind(filename)
+        key = text_cache_key_for_hash(content_hash, kind) if kind else None
+        return self._submit(kind, key, _parse_file_in_worker, path)
+
+    def _submit(self, kind, key, parse, source):
+        done = Future()
+        if kind is None:
+            done.set_result({"text": "", "pages": 0, "seconds": 0.0})
+            return done
+
+        record = text_cache.get(key)
+        if record is not None:
+            done.set_result(record)
+            return done
+
+        def store(future, resubmits=0):
+            if done.done():
+                return  # abandoned by result() after a timeout
+            try:
+                record = future.result()
+            except BrokenProcessPool as e:
+                # The pool was recycled under this document; try it on the new one
+                if resubmits < EXTRACT_RESUBMITS:
+                    run(resubmits + 1)
+                    return
+                record = {"text": "", "pages": 0, "seconds": 0.0, "error": f"extraction failed: {e}"}
+            except Exception as e:
+                record = {"text": "", "pages": 0, "seconds": 0.0, "error": f"extraction failed: {e}"}
+            if "error" not in record:
+                text_cache.put(key, record)
+            try:
+                done.set_result(record)
+            except InvalidStateError:
+                pass
+
+        def run(resubmits=0):
+            self._pool().submit(parse, source, kind, self.timeout).add_done_callback(
+                lambda future: store(future, resubmits)
+            )
+
+        run()
+        return done
+
+    def result(self, future, timeout=None):
+        """Wait for an extraction future, giving up after ``timeout`` (default EXTRACT_TIMEOUT).
+
+        A document still parsing by then is abandoned with an "extraction timed
+        out" record, and the worker pool is recycled so the stuck process is killed.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout or None)
+        except TimeoutError:
+            record = _timed_out(timeout)
+            try:
+                future.set_result(record)
+            except InvalidStateError:
+                return future.result()  # finished just now
+            self._recycle()
+            return record
+
+    def _recycle(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # Other documents in flight fail with BrokenProcessPool and are resubmitted
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False)
+
+    def extract_many(self, documents):
+        """Extract ``(content, filename)`` pairs in parallel; records come back in input order."""
+        futures = [self.submit(content, filename) for content, filename in documents]
+        return [self.result(future) for future in futures]
+
+    def extract_paths(self, paths):
+        documents = []
+        for path in paths:
+            with open(path, "rb") as f:
+                documents.append((f.read(), path))
+        return self.extract_many(documents)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+extraction_stage = ExtractionStage()
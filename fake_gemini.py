@@ -0,0 +1,205 @@
+"""Local stand-in for the Gemini REST API.
+
+Serves generateContent and cachedContents (create/delete) so the LLM layer can
+be exercised without network access or an API key:
+
+    python fake_gemini.py --port 8765
+    GEMINI_BASE_URL=http://127.0.0.1:8765/v1beta GEMINI_API_KEY=fake python worker.py
+
+Every generateContent call answers with the same canned JSON text, after an
+optional delay, and fails with a 503 at the configured error rate. The same
+behaviour is available in-process as LLM_BACKEND=fake (see llm_backends.py).
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+FAKE_LLM_LATENCY_JITTER = float(os.getenv("FAKE_LLM_LATENCY_JITTER", "0"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_RESPONSE_FILE = os.getenv("FAKE_LLM_RESPONSE_FILE")
+
+DEFAULT_RESPONSE = {
+    "name": "Fake Candidate",
+    "email": "fake.candidate@example.com",
+    "contact no": "",
+    "score": {
+        "value": 50.0,
+        "components": {
+            "technical_skills": {"score": 20.0, "matched": [{"skill": "Python"}], "missing": []},
+            "experience": {"score": 15.0, "years": 3, "field": "Software Engineering", "company": "Example Corp"},
+            "education": {"score": 8.0, "degree": "B.Sc. Computer Science, Example University"},
+            "soft_skills": {"score": 4.0, "matched": [{"skill": "Communication"}]},
+            "certifications": {"score": 3.0, "items": []},
+        },
+    },
+    "analysis": {"strengths": ["Python"], "weaknesses": [], "suggestions": []},
+}
+PACKED_RESUME_ID = re.compile(r"=== Resume (R\d+) ===")
+
+
+def load_response_text(path=FAKE_LLM_RESPONSE_FILE):
+    if not path:
+        return json.dumps(DEFAULT_RESPONSE)
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def fake_latency(latency, jitter):
+    return max(0.0, latency + random.uniform(-jitter, jitter))
+
+
+def fake_reply(prompt, response_text):
+    """The canned reply for ``prompt``; packed prompts get one copy per resume id."""
+    resume_ids = PACKED_RESUME_ID.findall(prompt)
+    if not resume_ids:
+        return response_text
+    entry = json.loads(response_text)
+    return json.dumps([dict(entry, resume_id=resume_id) for resume_id in resume_ids])
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _text(contents):
+    return "".join(part.get("text", "") for content in contents for part in content.get("parts", []))
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, response_text, latency=0.0, latency_jitter=0.0, error_rate=0.0):
+        super().__init__(address, FakeGeminiHandler)
+        self.response_text = response_text
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.caches = {}
+        self.stats = {"generate": 0, "errors": 0, "cache_hits": 0, "caches_created": 0, "caches_deleted": 0, "prompt_tokens": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1beta"
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message):
+        self._reply(status, {"error": {"code": status, "message": message}})
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        server = self.server
+        path = self.path.split("?", 1)[0]
+        body = self._body()
+
+        if path == "/v1beta/cachedContents":
+            name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+            tokens = _tokens(_text([body.get("systemInstruction", {})]) + _text(body.get("contents", [])))
+            with server.lock:
+                server.caches[name] = {"model": body.get("model"), "tokens": tokens}
+                server.stats["caches_created"] += 1
+            self._reply(200, {"name": name, "model": body.get("model"), "usageMetadata": {"totalTokenCount": tokens}})
+            return
+
+        if path.endswith(":generateContent"):
+            time.sleep(fake_latency(server.latency, server.latency_jitter))
+            if random.random() < server.error_rate:
+                with server.lock:
+                    server.stats["errors"] += 1
+                self._error(503, "The model is overloaded. Please try again later.")
+                return
+
+            cached_tokens = 0
+            with server.lock:
+                if "cachedContent" in body:
+                    cache = server.caches.get(body["cachedContent"])
+                    if cache is None:
+                        self._error(404, f"CachedContent not found: {body['cachedContent']}")
+                        return
+                    cached_tokens = cache["tokens"]
+                    server.stats["cache_hits"] += 1
+                prompt_tokens = _tokens(_text(body.get("contents", [])))
+                server.stats["generate"] += 1
+                server.stats["prompt_tokens"] += prompt_tokens
+            text = fake_reply(_text(body.get("contents", [])), server.response_text)
+            self._reply(200, {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens + cached_tokens,
+                    "cachedContentTokenCount": cached_tokens,
+                    "candidatesTokenCount": _tokens(text),
+                },
+            })
+            return
+
+        self._error(404, f"Unknown endpoint {path}")
+
+    def do_DELETE(self):
+        name = self.path.split("?", 1)[0][len("/v1beta/"):]
+        with self.server.lock:
+            if self.server.caches.pop(name, None) is None:
+                self._error(404, f"CachedContent not found: {name}")
+                return
+            self.server.stats["caches_deleted"] += 1
+        self._reply(200, {})
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.server.lock:
+                self._reply(200, dict(self.server.stats, live_caches=len(self.server.caches)))
+            return
+        self._error(404, f"Unknown endpoint {self.path}")
+
+
+def start_fake_gemini(host="127.0.0.1", port=0, response_text=None, latency=FAKE_LLM_LATENCY,
+                      latency_jitter=FAKE_LLM_LATENCY_JITTER, error_rate=FAKE_LLM_ERROR_RATE):
+    """Start the fake server on a background thread; use ``server.base_url`` as GEMINI_BASE_URL."""
+    server = FakeGeminiServer(
+        (host, port), response_text or load_response_text(), latency, latency_jitter, error_rate
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake Gemini API for offline runs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_GEMINI_PORT", "8765")))
+    parser.add_argument("--response-file", default=FAKE_LLM_RESPONSE_FILE,
+                        help="file holding the JSON every generateContent call returns")
+    parser.add_argument("--latency", type=float, default=FAKE_LLM_LATENCY, help="seconds per call")
+    parser.add_argument("--latency-jitter", type=float, default=FAKE_LLM_LATENCY_JITTER,
+                        help="uniform +/- jitter on the latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=FAKE_LLM_ERROR_RATE,
+                        help="fraction of calls answered with a 503")
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(
+        (args.host, args.port), load_response_text(args.response_file),
+        args.latency, args.latency_jitter, args.error_rate,
+    )
+    print(f"Fake Gemini listening on {server.base_url}")
+    server.serve_forever()
@@ -1,12 +1,167 @@
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Optional, Type
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from langchain_core.language_models import LLM
+from pydantic import BaseModel
+
+from rate_limit import AdaptiveRateLimiter, backoff_delay, retry_after_seconds
 
 from dotenv import load_dotenv
 load_dotenv()
 
+# Cap on in-flight Gemini requests, shared by every client in the process so a
+# large batch cannot open more connections than the provider quota allows.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+_gemini_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+
+# HTTP client settings. Connections are kept alive and reused across calls so
+# only the first request to the provider pays the TCP/TLS handshake.
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "10"))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "120"))
+GEMINI_POOL_MAXSIZE = int(os.getenv("GEMINI_POOL_MAXSIZE", str(GEMINI_MAX_CONCURRENCY)))
+GEMINI_KEEPALIVE_EXPIRY = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY", "60"))
+
+# Provider quotas. Every evaluation in the process draws from the same limiter,
+# and 429/5xx responses are retried with jittered exponential backoff.
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_BACKOFF_BASE = float(os.getenv("GEMINI_BACKOFF_BASE", "1"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "60"))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+gemini_limiter = AdaptiveRateLimiter(GEMINI_RPM, GEMINI_TPM)
+
+# API root; point it at fake_gemini.py to run without network access or a key.
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+
+# Provider-side context caching: for a batch, the system prompt and JD are
+# uploaded once as cachedContents and each request only carries the resume.
+# The cache is deleted when the batch ends; the TTL only bounds leaks.
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "0") == "1"
+GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+
+
+@lru_cache(maxsize=None)
+def gemini_response_schema(model):
+    """``model``'s JSON schema in the OpenAPI subset Gemini takes as responseSchema.
+
+    References are inlined and every property is required, so replies always
+    carry the full structure.
+    """
+    schema = model.model_json_schema(by_alias=True)
+    definitions = schema.get("$defs", {})
+
+    def convert(node):
+        if "$ref" in node:
+            node = definitions[node["$ref"].rsplit("/", 1)[-1]]
+        converted = {"type": node["type"].upper()}
+        for key in ("description", "minimum", "maximum"):
+            if key in node:
+                converted[key] = node[key]
+        if node["type"] == "object":
+            converted["properties"] = {key: convert(value) for key, value in node["properties"].items()}
+            converted["required"] = list(node["properties"])
+            converted["propertyOrdering"] = list(node["properties"])
+        elif node["type"] == "array":
+            converted["items"] = convert(node["items"])
+        return converted
+
+    return convert(schema)
+
+
+_session = None
+_session_lock = threading.Lock()
+_async_client = None
+_async_loop = None
+
+
+def get_session():
+    """Process-wide keep-alive session for synchronous provider calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=GEMINI_POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+@asynccontextmanager
+async def gemini_slot():
+    """Hold one of the process-wide _gemini_slots from async code.
+
+    Sync and async calls share the one GEMINI_MAX_CONCURRENCY cap; when no
+    slot is free the wait happens on a worker thread, not on the event loop.
+    """
+    if not _gemini_slots.acquire(blocking=False):
+        acquiring = asyncio.ensure_future(asyncio.to_thread(_gemini_slots.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The thread still takes the slot; give it back once it has
+            acquiring.add_done_callback(lambda _: _gemini_slots.release())
+            raise
+    try:
+        yield
+    finally:
+        _gemini_slots.release()
+
+
+async def _close_async_client(client, loop):
+    """Close a client left behind by a previous event loop, on that loop if it still runs."""
+    try:
+        if loop not in (None, asyncio.get_running_loop()) and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        else:
+            await client.aclose()
+    except Exception as e:
+        print("HTTP Client Close Error:", e)
+
+
+async def get_async_client():
+    """Keep-alive httpx client bound to the running event loop."""
+    global _async_client, _async_loop
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop:
+        previous, previous_loop = _async_client, _async_loop
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GEMINI_READ_TIMEOUT, connect=GEMINI_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=GEMINI_POOL_MAXSIZE,
+                max_keepalive_connections=GEMINI_POOL_MAXSIZE,
+                keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _async_loop = loop
+        if previous is not None:
+            await _close_async_client(previous, previous_loop)
+    return _async_client
+
+
+async def close_clients():
+    global _session, _async_client, _async_loop
+    if _async_client is not None:
+        await _close_async_client(_async_client, _async_loop)
+        _async_client = _async_loop = None
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
 # Full system prompt defining the AI behavior and scoring methodology
 
 SYSTEM_PROMPT = """SYSTEM PROMPT:
@@ -226,74 +381,46 @@ Bonus Points (Max +5):
 }
 
 """
- 
-# class GroqLLM(LLM):
-
-#     model: str = "llama3-70b-8192"
-#     temperature: float = 0.5 
-#     def _call(self, prompt: str, stop=None, run_manager=None) -> str:
-
-#         headers = {
-
-#             "Authorization": f"Bearer {os.environ['GROQ_API_KEY']}",
-#             "Content-Type": "application/json",
-
-#         }
- 
-#         payload = {
-
-#             "model": self.model,
-#             "messages": [
-#                 {"role": "system", "content": SYSTEM_PROMPT},
-#                 {"role": "user", "content": prompt}
-#             ],
-#             "temperature": self.temperature,
-#         }
-#         response = requests.post(
-
-#             "https://api.groq.com/openai/v1/chat/completions",
-
-#             json=payload,
-
-#             headers=headers,
-
-#         )
- 
-#         response.raise_for_status()
-
-#         return response.json()["choices"][0]["message"]["content"]
- 
-#     @property
-
-#     def _llm_type(self) -> str:
-
-#         return "custom-groq"
- 
-#     def get_num_tokens(self, text: str) -> int:
-
-#         return len(text.split())
-
-
 
+# Section 8 of SYSTEM_PROMPT, the JSON template of the reply. With a response
+# schema the provider already constrains the shape, so the template is left
+# out of the system prompt and only added to free-form follow-up prompts.
+OUTPUT_FORMAT = SYSTEM_PROMPT[SYSTEM_PROMPT.index("8. OUTPUT FORMAT:"):].strip()
+STRUCTURED_SYSTEM_PROMPT = SYSTEM_PROMPT[:SYSTEM_PROMPT.index("8. OUTPUT FORMAT:")].rstrip() + "\n"
 
 
 # Gemini LLM
 class GroqLLM(LLM):
     model: str = "models/gemini-2.0-flash"
     temperature: float = 0.5
+    system_prompt: str = SYSTEM_PROMPT
+    max_output_tokens: int = 2048
+    cached_content: Optional[str] = None
+    # Replies are constrained to this model's schema (provider structured output)
+    response_model: Optional[Type[BaseModel]] = None
 
-    def _call(self, prompt: str, stop=None, run_manager=None) -> str:
-        headers = {
+    @property
+    def prompt_hash(self) -> str:
+        # Part of the evaluation cache key: editing the prompt invalidates cached results
+        return hashlib.sha256(self.system_prompt.encode("utf-8")).hexdigest()
+
+    def _headers(self):
+        return {
             "Content-Type": "application/json",
             "x-goog-api-key": os.environ["GEMINI_API_KEY"]
         }
 
+    def _build_request(self, prompt: str):
+        headers = self._headers()
+
+        # With a context cache the system prompt (and JD) are already on the provider
+        text = prompt if self.cached_content else f"{self.system_prompt}\n\n{prompt}"
         payload = {
             "contents": [
                 {
                     "role": "user",
                     "parts": [
-                        {"text": f"{SYSTEM_PROMPT}\n\n{prompt}"}
+                        {"text": text}
                     ]
                 }
             ],
@@ -301,16 +428,153 @@ class GroqLLM(LLM):
                 "temperature": self.temperature,
                 "topK": 1,
                 "topP": 1.0,
-                "maxOutputTokens": 2048
+                "maxOutputTokens": self.max_output_tokens
             }
         }
+        if self.cached_content:
+            payload["cachedContent"] = self.cached_content
+        if self.response_model is not None:
+            payload["generationConfig"]["responseMimeType"] = "application/json"
+            payload["generationConfig"]["responseSchema"] = gemini_response_schema(self.response_model)
 
-        url = f"https://generativelanguage.googleapis.com/v1beta/{self.model}:generateContent"
+        url = f"{GEMINI_BASE_URL}/{self.model}:generateContent"
+        return url, headers, payload
 
-        response = requests.post(url, headers=headers, json=payload)
+    def create_context_cache(self, context: str) -> str:
+        """Upload the system prompt plus ``context`` as cachedContents and return its name."""
+        payload = {
+            "model": self.model,
+            "systemInstruction": {"parts": [{"text": self.system_prompt}]},
+            "contents": [{"role": "user", "parts": [{"text": context}]}],
+            "ttl": f"{GEMINI_CONTEXT_CACHE_TTL}s",
+        }
+        response = get_session().post(
+            f"{GEMINI_BASE_URL}/cachedContents",
+            headers=self._headers(),
+            json=payload,
+            timeout=(GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT),
+        )
         response.raise_for_status()
+        return response.json()["name"]
+
+    def delete_context_cache(self, name: str):
+        response = get_session().delete(
+            f"{GEMINI_BASE_URL}/{name}",
+            headers=self._headers(),
+            timeout=(GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT),
+        )
+        response.raise_for_status()
+
+    @contextmanager
+    def context_cache(self, context: str):
+        """Yield a copy of this LLM that reuses ``context`` from a provider cache.
+
+        Prompts sent through the copy must leave ``context`` out. Yields None
+        when the cache cannot be created (e.g. the context is below the
+        provider's minimum size); the cache is deleted on exit.
+        """
+        try:
+            name = self.create_context_cache(context)
+        except Exception as e:
+            print("Context Cache Error:", e)
+            yield None
+            return
+
+        try:
+            yield self.model_copy(update={"cached_content": name})
+        finally:
+            try:
+                self.delete_context_cache(name)
+            except Exception as e:
+                print("Context Cache Error:", e)
+
+    @staticmethod
+    def _response_text(data) -> str:
+        return data["candidates"][0]["content"]["parts"][0]["text"]
+
+    def _estimate_tokens(self, payload) -> int:
+        text = "".join(
+            part.get("text", "")
+            for content in payload["contents"]
+            for part in content["parts"]
+        )
+        return max(1, len(text) // 4)
+
+    def _retry_delay(self, attempt, status=None, headers=None):
+        """Seconds to wait before the next attempt, or None if the failure is final."""
+        if attempt >= GEMINI_MAX_RETRIES:
+            return None
+        if status is not None and status not in RETRYABLE_STATUS:
+            return None
+
+        delay = retry_after_seconds(headers)
+        if delay is None:
+            delay = backoff_delay(attempt, GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_MAX)
+        if status == 429:
+            # Quota exhausted: hold back every caller, not just this one
+            gemini_limiter.throttle(delay)
+            return 0.0
+        return delay
 
-        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+    def _call(self, prompt: str, stop=None, run_manager=None) -> str:
+        url, headers, payload = self._build_request(prompt)
+        tokens = self._estimate_tokens(payload)
+
+        attempt = 0
+        while True:
+            gemini_limiter.acquire(tokens)
+            try:
+                with _gemini_slots:
+                    response = get_session().post(
+                        url,
+                        headers=headers,
+                        json=payload,
+                        timeout=(GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT),
+                    )
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = None
+                if response.status_code in RETRYABLE_STATUS:
+                    delay = self._retry_delay(attempt, response.status_code, response.headers)
+                if delay is None:
+                    response.raise_for_status()
+                    gemini_limiter.record_success()
+                    return self._response_text(response.json())
+
+            time.sleep(delay)
+            attempt += 1
+
+    async def _acall(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        import httpx
+
+        url, headers, payload = self._build_request(prompt)
+        tokens = self._estimate_tokens(payload)
+        client = await get_async_client()
+
+        attempt = 0
+        while True:
+            await gemini_limiter.aacquire(tokens)
+            try:
+                async with gemini_slot():
+                    response = await client.post(url, headers=headers, json=payload)
+            except httpx.TransportError:
+                delay = self._retry_delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = None
+                if response.status_code in RETRYABLE_STATUS:
+                    delay = self._retry_delay(attempt, response.status_code, response.headers)
+                if delay is None:
+                    response.raise_for_status()
+                    gemini_limiter.record_success()
+                    return self._response_text(response.json())
+
+            await asyncio.sleep(delay)
+            attempt += 1
 
     @property
     def _llm_type(self) -> str:
@@ -0,0 +1,70 @@
+"""Report how long the entry points take to import.
+
+    python import_budget.py                 # api, main and worker
+    python import_budget.py api --top 20
+
+Each module is imported in a fresh interpreter with ``-X importtime``. The
+slowest top-level packages are listed, and the exit status is non-zero when a
+module takes longer than its budget (IMPORT_BUDGET_SECONDS, default 2.0).
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "2.0"))
+DEFAULT_MODULES = ["api", "main", "worker"]
+
+
+def import_times(module):
+    """Return ``(total_seconds, {top_level_package: self_seconds})`` for importing ``module``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+        raise RuntimeError(f"import {module} failed: {error}")
+
+    total = 0.0
+    packages = defaultdict(float)
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us) / 1e6
+        if name.strip() == module:
+            total = int(cumulative_us) / 1e6
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time of the application entry points.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="seconds allowed per module")
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list per module")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.modules:
+        try:
+            total, packages = import_times(module)
+        except RuntimeError as e:
+            print(e)
+            over_budget = True
+            continue
+
+        status = "OK" if total <= args.budget else "OVER BUDGET"
+        over_budget |= total > args.budget
+        print(f"{module}: {total:.3f}s (budget {args.budget:.3f}s) {status}")
+        for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {seconds:8.3f}s  {name}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
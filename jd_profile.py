@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from cache_store import CACHE_DIR
+from utils import extract_text
+
+# Prepared JDs are kept in memory for the life of the process and on disk so
+# later batches (and restarts) skip PDF parsing entirely.
+JD_CACHE_DIR = os.getenv("JD_CACHE_DIR", os.path.join(CACHE_DIR, "jd"))
+
+_profiles = {}
+_lock = threading.Lock()
+
+REQUIRED_HEADINGS = re.compile(r"(?i)\b(requirements?|required|must[- ]have|qualifications|skills)\b")
+OPTIONAL_HEADINGS = re.compile(r"(?i)\b(preferred|nice[- ]to[- ]have|good[- ]to[- ]have|desired|bonus|plus)\b")
+YEARS_PATTERN = re.compile(r"(?i)(\d+(?:\.\d+)?)\s*\+?\s*(?:(?:-|–|to)\s*\d+(?:\.\d+)?\s*)?\+?\s*years?")
+DEGREE_PATTERN = re.compile(
+    r"(?i)\b(ph\.?d|doctorate|master['’]?s?|m\.tech|mtech|m\.sc|msc|mba|bachelor['’]?s?|b\.tech|btech|b\.e\.|b\.sc|bsc|associate['’]?s? degree|degree in)\b"
+)
+SKILL_PREFIXES = re.compile(
+    r"(?i)^(?:(?:strong|solid|basic|good|excellent|proven|hands[- ]on)\s+)*"
+    r"(?:proficiency|experience|familiarity|knowledge|understanding|expertise|skills?)?\s*(?:in|with|of)?\s+"
+)
+
+
+@dataclass
+class JDProfile:
+    key: str
+    text: str
+    required_skills: List[str] = field(default_factory=list)
+    optional_skills: List[str] = field(default_factory=list)
+    min_years: Optional[float] = None
+    degree: Optional[str] = None
+
+
+def normalize_text(text):
+    """Collapse whitespace, drop markdown emphasis and repeated lines."""
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[*_#`]+", "", line)
+        line = re.sub(r"\s+", " ", line).strip()
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _split_skills(line):
+    line = re.sub(r"^[-•∙*·]\s*", "", line).rstrip(".")
+    line = SKILL_PREFIXES.sub("", line, count=1)
+    skills = []
+    for item in re.split(r",|;|/|\band\b|\bor\b|\(|\)", line):
+        item = item.strip(" .:-")
+        if item and len(item.split()) <= 4:
+            skills.append(item)
+    return skills
+
+
+def build_jd_profile(text, key):
+    text = normalize_text(text)
+    profile = JDProfile(key=key, text=text)
+
+    section = None
+    for line in text.splitlines():
+        is_heading = line.endswith(":") and len(line.split()) <= 6
+        if is_heading:
+            if OPTIONAL_HEADINGS.search(line):
+                section = "optional"
+            elif REQUIRED_HEADINGS.search(line):
+                section = "required"
+            else:
+                section = None
+            continue
+
+        years = YEARS_PATTERN.search(line)
+        if years:
+            value = float(years.group(1))
+            if section != "optional" and (profile.min_years is None or value < profile.min_years):
+                profile.min_years = value
+            # Keep the skills named on the same line ("5+ years of experience in
+            # Python", "Python: 3 years")
+            line = re.sub(r"(?i)^\s*of\s+", "", line[years.end():]).strip() or line[:years.start()]
+
+        if DEGREE_PATTERN.search(line):
+            if profile.degree is None:
+                profile.degree = re.sub(r"^[-•∙*·]\s*", "", line).rstrip(".")
+            continue
+
+        if section == "required":
+            profile.required_skills.extend(_split_skills(line))
+        elif section == "optional":
+            profile.optional_skills.extend(_split_skills(line))
+
+    profile.required_skills = list(dict.fromkeys(profile.required_skills))
+    profile.optional_skills = [
+        s for s in dict.fromkeys(profile.optional_skills) if s not in profile.required_skills
+    ]
+    return profile
+
+
+def _file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(JD_CACHE_DIR, f"{key}.json")
+
+
+def _load(key):
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            return JDProfile(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _save(profile):
+    try:
+        os.makedirs(JD_CACHE_DIR, exist_ok=True)
+        with open(_cache_path(profile.key), "w", encoding="utf-8") as f:
+            json.dump(asdict(profile), f)
+    except OSError as e:
+        print("JD Cache Write Error:", e)
+
+
+def prepare_jd(jd_file, jd_uuid=None):
+    """Return the prepared JDProfile for ``jd_file``, extracting it at most once.
+
+    Profiles are keyed by the file's content hash, prefixed with ``jd_uuid`` when
+    given, so a JD replaced under the same uuid gets a fresh profile.
+    """
+    digest = _file_digest(jd_file)
+    key = f"{jd_uuid}_{digest}" if jd_uuid else digest
+    with _lock:
+        profile = _profiles.get(key)
+        if profile is None:
+            profile = _load(key)
+            if profile is None:
+                profile = build_jd_profile(extract_text(jd_file), key)
+                _save(profile)
+            _profiles[key] = profile
+    return profile
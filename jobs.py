@@ -0,0 +1,157 @@
+import mimetypes
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+import models
+from blob_store import blob_store
+
+# Items whose worker has held them longer than the lease are assumed to belong
+# to a crashed worker and become claimable again.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Working copies of stored files for the matcher. Kept apart from ./uploads,
+# which the API overwrites when the same uuid and filename come in again.
+JOB_FILES_DIR = os.getenv("JOB_FILES_DIR", "job_files")
+
+TERMINAL_STATUSES = ("done", "failed")
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+def create_job(db: Session, jd_uuid, resume_uuids):
+    job = models.EvaluationJob(jd_uuid=jd_uuid)
+    db.add(job)
+    db.flush()
+    db.add_all(
+        models.EvaluationJobItem(job_id=job.id, resume_uuid=resume_uuid, position=position, status="queued", attempts=0)
+        for position, resume_uuid in enumerate(resume_uuids)
+    )
+    db.commit()
+    return job
+
+
+def job_counts(db: Session, job_id):
+    rows = (
+        db.query(models.EvaluationJobItem.status, func.count())
+        .filter(models.EvaluationJobItem.job_id == job_id)
+        .group_by(models.EvaluationJobItem.status)
+        .all()
+    )
+    counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+    counts.update({status: count for status, count in rows})
+    return counts
+
+
+def job_status(counts):
+    if counts["queued"] and not (counts["running"] or counts["done"] or counts["failed"]):
+        return "queued"
+    if counts["queued"] or counts["running"]:
+        return "running"
+    return "failed" if counts["failed"] and not counts["done"] else "done"
+
+
+def claim_items(db: Session, worker_id, limit):
+    """Lease up to ``limit`` claimable items to ``worker_id``.
+
+    Candidates are read with SKIP LOCKED where the database supports it, and each
+    one is then taken with a conditional UPDATE, so two workers can never run the
+    same item even on SQLite.
+    """
+    now = utcnow()
+    stale = now - timedelta(seconds=JOB_LEASE_SECONDS)
+    expired = and_(models.EvaluationJobItem.status == "running", models.EvaluationJobItem.locked_at < stale)
+
+    # A stale item has already used the attempt that crashed or hung its worker;
+    # once those reach the cap it fails instead of being handed out again
+    db.execute(
+        update(models.EvaluationJobItem)
+        .where(expired, models.EvaluationJobItem.attempts >= JOB_MAX_ATTEMPTS)
+        .values(status="failed", error="worker lease expired", locked_by=None, locked_at=None)
+    )
+    claimable = or_(
+        models.EvaluationJobItem.status == "queued",
+        and_(expired, models.EvaluationJobItem.attempts < JOB_MAX_ATTEMPTS),
+    )
+
+    candidates = (
+        db.query(models.EvaluationJobItem.id)
+        .filter(claimable)
+        .order_by(models.EvaluationJobItem.created_at, models.EvaluationJobItem.position)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    claimed = []
+    for (item_id,) in candidates:
+        taken = db.execute(
+            update(models.EvaluationJobItem)
+            .where(models.EvaluationJobItem.id == item_id, claimable)
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=models.EvaluationJobItem.attempts + 1,
+            )
+        )
+        if taken.rowcount:
+            claimed.append(item_id)
+    db.commit()
+
+    if not claimed:
+        return []
+    return db.query(models.EvaluationJobItem).filter(models.EvaluationJobItem.id.in_(claimed)).all()
+
+
+def complete_item(db: Session, item, result):
+    item.status = "done"
+    item.result = result
+    item.error = None
+    item.locked_by = None
+    db.commit()
+
+
+def fail_item(db: Session, item, error):
+    # Put the item back in the queue until it runs out of attempts
+    item.status = "failed" if item.attempts >= JOB_MAX_ATTEMPTS else "queued"
+    item.error = str(error)[:2000]
+    item.locked_by = None
+    item.locked_at = None
+    db.commit()
+
+
+def materialize_jd(db: Session, jd_uuid):
+    """Write a stored JD to the job files folder and return its path (None if unknown)."""
+    jd = db.query(models.JobDescription).filter(models.JobDescription.id == jd_uuid).first()
+    if jd is None:
+        return None
+    extension = mimetypes.guess_extension(jd.content_type or "") or ".pdf"
+    return _copy_upload(f"{jd_uuid}_{jd.title or 'jd'}{extension}", jd.content_hash)
+
+
+def materialize_resume(db: Session, resume_uuid):
+    pdf = db.query(models.PDFDocument).filter(models.PDFDocument.id == resume_uuid).first()
+    if pdf is None:
+        return None
+    return _copy_upload(f"{resume_uuid}_{pdf.filename}", pdf.content_hash)
+
+
+def _copy_upload(name, content_hash):
+    # The matcher picks the parser from the file extension, so the blob is
+    # exposed under its upload name. It is copied rather than hard-linked:
+    # anything that later opens the path for writing would rewrite the blob.
+    if not content_hash or not blob_store.exists(content_hash):
+        return None
+    os.makedirs(JOB_FILES_DIR, exist_ok=True)
+    path = os.path.join(JOB_FILES_DIR, name.replace("/", "_"))
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(blob_store.path(content_hash), tmp_path)
+        os.replace(tmp_path, path)
+    return path
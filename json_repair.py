@@ -0,0 +1,98 @@
+import json
+
+# Recovery for model output that json.loads rejects. salvage_json reads the text
+# as a stream and keeps every key/value pair that parsed completely before the
+# point where the JSON breaks (truncation, a stray quote, a missing comma, ...).
+# The caller then asks the model for just the sections that are still missing
+# and merges them in with set_path.
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def _skip(text, pos, chars=_WHITESPACE):
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _salvage_object(text, pos, path, incomplete):
+    """Parse the object at text[pos]; returns ``(obj, end, complete)``.
+
+    Objects that break part-way are returned with the keys read so far, and
+    their dotted paths are added to ``incomplete``.
+    """
+    obj = {}
+    pos = _skip(text, pos + 1)
+    while pos < len(text):
+        if text[pos] == "}":
+            return obj, pos + 1, True
+        try:
+            key, pos = _decoder.raw_decode(text, pos)
+        except ValueError:
+            break
+        pos = _skip(text, pos)
+        if not isinstance(key, str) or pos >= len(text) or text[pos] != ":":
+            break
+        pos = _skip(text, pos + 1)
+        key_path = f"{path}.{key}" if path else key
+
+        if pos < len(text) and text[pos] == "{":
+            value, pos, complete = _salvage_object(text, pos, key_path, incomplete)
+            obj[key] = value
+            if not complete:
+                break
+        else:
+            try:
+                obj[key], pos = _decoder.raw_decode(text, pos)
+            except ValueError:
+                break
+        pos = _skip(text, pos, _WHITESPACE + ",")
+
+    incomplete.add(path)
+    return obj, pos, False
+
+
+def salvage_json(text):
+    """Return ``(data, incomplete_paths)`` for the first JSON object in ``text``.
+
+    ``data`` holds everything that parsed; ``incomplete_paths`` names the objects
+    (dotted paths, "" for the top level) that were cut off before their end.
+    """
+    start = text.find("{")
+    if start < 0:
+        return {}, {""}
+    incomplete = set()
+    data, _, _ = _salvage_object(text, start, "", incomplete)
+    return data, incomplete
+
+
+def get_path(data, path):
+    for key in path.split("."):
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def set_path(data, path, value):
+    *parents, last = path.split(".")
+    for key in parents:
+        if not isinstance(data.get(key), dict):
+            data[key] = {}
+        data = data[key]
+    data[last] = value
+
+
+def pop_path(data, path):
+    *parents, last = path.split(".")
+    for key in parents:
+        data = data.get(key)
+        if not isinstance(data, dict):
+            return None
+    return data.pop(last, None)
+
+
+def missing_sections(data, incomplete, sections):
+    """The ``sections`` (dotted paths) that are absent from ``data`` or were cut off."""
+    return [path for path in sections if path in incomplete or get_path(data, path) is None]
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import fake_gemini
+from groq_llm import SYSTEM_PROMPT, GroqLLM
+
+# LLM provider used by ResumeMatcherCore, chosen with LLM_BACKEND:
+#   "gemini": Google Gemini (GEMINI_API_KEY, GEMINI_BASE_URL)
+#   "openai": any OpenAI-compatible chat completions API, Groq by default
+#             (OPENAI_API_KEY or GROQ_API_KEY, OPENAI_BASE_URL, OPENAI_MODEL)
+#   "fake":   in-process canned responses for load tests and offline runs
+#             (FAKE_LLM_LATENCY, FAKE_LLM_LATENCY_JITTER, FAKE_LLM_ERROR_RATE,
+#             FAKE_LLM_RESPONSE_FILE)
+# All backends share the request limiter, concurrency cap and retry settings in
+# groq_llm.py (GEMINI_RPM, GEMINI_MAX_CONCURRENCY, ...).
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1").rstrip("/")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "llama3-70b-8192")
+
+
+class OpenAICompatibleLLM(GroqLLM):
+    """Chat completions client (Groq, OpenAI, vLLM, ...).
+
+    These providers cache repeated prompt prefixes on their own, so there is no
+    explicit context cache; the system prompt goes first to benefit from it.
+    """
+    model: str = OPENAI_MODEL
+    base_url: str = OPENAI_BASE_URL
+
+    def _headers(self):
+        api_key = os.getenv("OPENAI_API_KEY") or os.environ["GROQ_API_KEY"]
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def _build_request(self, prompt: str):
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature,
+            "max_tokens": self.max_output_tokens
+        }
+        if self.response_model is not None:
+            # JSON mode is widely supported, unlike json_schema; the reply is
+            # still validated against response_model by the caller
+            payload["response_format"] = {"type": "json_object"}
+        return f"{self.base_url}/chat/completions", self._headers(), payload
+
+    @staticmethod
+    def _response_text(data) -> str:
+        return data["choices"][0]["message"]["content"]
+
+    def _estimate_tokens(self, payload) -> int:
+        return max(1, sum(len(message["content"]) for message in payload["messages"]) // 4)
+
+    @contextmanager
+    def context_cache(self, context: str):
+        yield None
+
+    @property
+    def _llm_type(self) -> str:
+        return "custom-openai"
+
+
+class FakeLLM(GroqLLM):
+    """Answers every prompt with canned JSON after a configurable delay, failing at ``error_rate``."""
+    model: str = "fake"
+    latency: float = fake_gemini.FAKE_LLM_LATENCY
+    latency_jitter: float = fake_gemini.FAKE_LLM_LATENCY_JITTER
+    error_rate: float = fake_gemini.FAKE_LLM_ERROR_RATE
+    response_text: str = ""
+
+    def _reply(self, prompt: str) -> str:
+        if random.random() < self.error_rate:
+            raise RuntimeError("Fake LLM error")
+        return fake_gemini.fake_reply(prompt, self.response_text or fake_gemini.load_response_text())
+
+    def _call(self, prompt: str, stop=None, run_manager=None) -> str:
+        time.sleep(fake_gemini.fake_latency(self.latency, self.latency_jitter))
+        return self._reply(prompt)
+
+    async def _acall(self, prompt: str, stop=None, run_manager=None, **kwargs) -> str:
+        await asyncio.sleep(fake_gemini.fake_latency(self.latency, self.latency_jitter))
+        return self._reply(prompt)
+
+    @contextmanager
+    def context_cache(self, context: str):
+        yield None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+
+BACKENDS = {
+    "gemini": GroqLLM,
+    "openai": OpenAICompatibleLLM,
+    "fake": FakeLLM,
+}
+
+
+def create_llm(system_prompt: str = SYSTEM_PROMPT, backend: Optional[str] = None, response_model=None):
+    backend = backend or LLM_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND {backend!r}; expected one of: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](system_prompt=system_prompt, response_model=response_model)
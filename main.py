@@ -3,7 +3,7 @@ from PyQt5.QtWidgets import (
 )
 from matcher import ResumeMatcherCore
 import json
-import psycopg2
+from database import raw_connection
 
 
 class ResumeMatcherGUI(QWidget):
@@ -91,78 +91,69 @@ class ResumeMatcherGUI(QWidget):
             self.text_output.append("Failed to insert results into PostgreSQL.")
 
     def insert_into_postgres(self, results):
-        db_config = {
-            "dbname": "Resume_JD",
-            "user": "postgres",
-            "password": "admin",
-            "host": "localhost",
-            "port": 5433
-        }
-
         try:
-            conn = psycopg2.connect(**db_config)
-            cursor = conn.cursor()
-
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS resume_analysis (
-                name TEXT,
-                final_score FLOAT,
-                technical_skills_score FLOAT,
-                technical_skills TEXT,
-                experience_score FLOAT,
-                experience TEXT,
-                education_score FLOAT,
-                education TEXT,
-                soft_skills_score FLOAT,
-                soft_skills TEXT,
-                certifications_score FLOAT,
-                certifications TEXT,
-                strengths TEXT,
-                weaknesses TEXT,
-                suggestions TEXT
-            );
-            """)
-
-            for res in results:
-                data = res.get("score_data", {})
-                print(data)
-                if "error" in data:
-                    continue
-
-                name = data.get("name", "")
-                score = data.get("score", {})
-                components = score.get("components", {})
-
-                row = (
-                    name,
-                    score.get("value", 0.0),
-                    components.get("technical_skills", {}).get("score", 0.0),
-                    ", ".join(components.get("technical_skills", {}).get("matched", [])),
-                    components.get("experience", {}).get("score", 0.0),
-                    components.get("experience", {}).get("field", ""),
-                    components.get("education", {}).get("score", 0.0),
-                    components.get("education", {}).get("matched", ""),
-                    components.get("soft_skills", {}).get("score", 0.0),
-                    ", ".join(components.get("soft_skills", {}).get("matched", [])),
-                    components.get("certifications", {}).get("score", 0.0),
-                    ", ".join(components.get("certifications", {}).get("matched", [])),
-                    ", ".join(data.get("analysis", {}).get("strengths", [])),
-                    ", ".join(data.get("analysis", {}).get("weaknesses", [])),
-                    ", ".join(data.get("analysis", {}).get("suggestions", [])),
-                )
+            with raw_connection() as conn:
+                cursor = conn.cursor()
 
                 cursor.execute("""
-                    INSERT INTO resume_analysis (
-                        name, final_score, technical_skills_score, technical_skills,
-                        experience_score, experience, education_score, education,
-                        soft_skills_score, soft_skills, certifications_score, certifications,
-                        strengths, weaknesses, suggestions
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-                """, row)
-
-            conn.commit()
-            cursor.close()
-            conn.close()
+                CREATE TABLE IF NOT EXISTS resume_analysis (
+                    name TEXT,
+                    final_score FLOAT,
+                    technical_skills_score FLOAT,
+                    technical_skills TEXT,
+                    experience_score FLOAT,
+                    experience TEXT,
+                    education_score FLOAT,
+                    education TEXT,
+                    soft_skills_score FLOAT,
+                    soft_skills TEXT,
+                    certifications_score FLOAT,
+                    certifications TEXT,
+                    strengths TEXT,
+                    weaknesses TEXT,
+                    suggestions TEXT
+                );
+                """)
+
+                for res in results:
+                    data = res.get("score_data", {})
+                    print(data)
+                    if "error" in data:
+                        continue
+
+                    name = data.get("name", "")
+                    score = data.get("score", {})
+                    components = score.get("components", {})
+
+                    row = (
+                        name,
+                        score.get("value", 0.0),
+                        components.get("technical_skills", {}).get("score", 0.0),
+                        ", ".join(components.get("technical_skills", {}).get("matched", [])),
+                        components.get("experience", {}).get("score", 0.0),
+                        components.get("experience", {}).get("field", ""),
+                        components.get("education", {}).get("score", 0.0),
+                        components.get("education", {}).get("matched", ""),
+                        components.get("soft_skills", {}).get("score", 0.0),
+                        ", ".join(components.get("soft_skills", {}).get("matched", [])),
+                        components.get("certifications", {}).get("score", 0.0),
+                        ", ".join(components.get("certifications", {}).get("matched", [])),
+                        ", ".join(data.get("analysis", {}).get("strengths", [])),
+                        ", ".join(data.get("analysis", {}).get("weaknesses", [])),
+                        ", ".join(data.get("analysis", {}).get("suggestions", [])),
+                    )
+
+                    cursor.execute("""
+                        INSERT INTO resume_analysis (
+                            name, final_score, technical_skills_score, technical_skills,
+                            experience_score, experience, education_score, education,
+                            soft_skills_score, soft_skills, certifications_score, certifications,
+                            strengths, weaknesses, suggestions
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+                    """, row)
+
+                conn.commit()
+                cursor.close()
             return True
 
         except Exception as e:
@@ -1,51 +1,80 @@
 import os
 import json
 import re
-import time
 import threading
-import psycopg2
-from crewai import Agent
-from groq_llm import GroqLLM
+from contextlib import contextmanager
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from groq_llm import GEMINI_CONTEXT_CACHE, OUTPUT_FORMAT, STRUCTURED_SYSTEM_PROMPT
+from llm_backends import create_llm
 from utils import extract_text
+from jd_profile import prepare_jd
+from extraction import extraction_stage
+import json_repair
+import prefilter
+import scoring
+import profiles
+import schemas
+from database import raw_connection
+from retry_worker import RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX, RETRY_CHANNEL, RETRY_WORKERS, RetryScheduler
+from cache_store import evaluation_cache, evaluation_key, sha256_text
 from dotenv import load_dotenv
 import uuid
 load_dotenv()
 
-class ResumeMatcherCore:
-    def __init__(self):
-        self.llm = GroqLLM(api_key=os.getenv("GEMINI_API_KEY"))
-        self.db_config = {
-            "dbname": "Resume_JD",
-            "user": "postgres",
-            "password": "admin",
-            "host": "localhost",
-            "port": 5433
-        }
+# Upper bound on resumes scored in parallel by run_batch. The LLM client applies
+# its own per-provider cap on top of this (see GEMINI_MAX_CONCURRENCY).
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+RESUME_EXTENSIONS = (".pdf", ".docx", ".txt")
 
-        self.job_parser_agent = Agent(
-            role="JobParser",
-            goal="Extract key requirements and structured info from the job description.",
-            backstory="Expert in job analysis and recruitment strategy.",
-            llm=self.llm
-        )
+# "llm": the model scores the resume itself per SYSTEM_PROMPT.
+# "local": the model only extracts facts and scoring.py computes the scores.
+# "profile": the model reads each resume once into a stored profile; matching
+#            against any JD is then done locally (profiles.py + scoring.py).
+SCORING_MODE = os.getenv("SCORING_MODE", "llm")
 
-        self.resume_analyzer_agent = Agent(
-            role="ResumeAnalyzer",
-            goal="Evaluate resumes against job description using transparent scoring per system prompt.",
-            backstory="Expert in resume parsing and hiring best practices.",
-            llm=self.llm
-        )
+# Multi-resume prompts: run_batch sends up to BATCH_PACK_SIZE resumes for the
+# same JD in one request, so the system prompt and JD are paid for once per pack
+# instead of once per resume. A pack is closed early once its input reaches
+# BATCH_PACK_TOKEN_BUDGET (estimated as chars / 4). 1 disables packing.
+BATCH_PACK_SIZE = int(os.getenv("BATCH_PACK_SIZE", "1"))
+BATCH_PACK_TOKEN_BUDGET = int(os.getenv("BATCH_PACK_TOKEN_BUDGET", "30000"))
+BATCH_PACK_OUTPUT_TOKENS = int(os.getenv("BATCH_PACK_OUTPUT_TOKENS", "8192"))
 
-        self.init_db()
+# "llm" mode only: the provider is sent schemas.ResumeEvaluation as the response
+# schema and every reply is validated against it, so neither the system prompt
+# (STRUCTURED_SYSTEM_PROMPT drops section 8) nor the prompts carry formatting
+# instructions. Set to 0 for providers without structured output.
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") == "1"
 
-    def init_db(self):
-        try:
-            conn = psycopg2.connect(**self.db_config)
+# When the model's JSON does not parse, keep the sections that did and ask the
+# model for only the missing ones (see repair_json) instead of logging the whole
+# evaluation for a full retry. These are the sections an evaluation must have,
+# per output format ("llm" mode) and fact format ("local" mode).
+JSON_REPAIR = os.getenv("JSON_REPAIR", "1") == "1"
+OUTPUT_SECTIONS = (
+    "name", "email", "score.value",
+    "score.components.technical_skills", "score.components.experience", "score.components.education",
+    "score.components.soft_skills", "score.components.certifications",
+    "analysis",
+)
+FACTS_SECTIONS = (
+    "name", "email", "required_skills", "optional_skills", "experience",
+    "soft_skills", "education", "certifications", "analysis",
+)
+
+# Advisory lock key held while a resume_analysis row is written (see insert_into_db)
+ANALYSIS_FEED_LOCK = 72021
+
+def ensure_analysis_schema():
+    """Create resume_analysis and resume_parse_errors, and the indexes behind /scores."""
+    try:
+        with raw_connection() as conn:
             cursor = conn.cursor()
 
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS resume_analysis (
-                    id uuid unique,
+                    id uuid,
                     name TEXT,
                     email TEXT,
                     contact_no TEXT,
@@ -66,19 +95,126 @@ class ResumeMatcherCore:
                 );
             """)
 
+            # Added after the first release; also the keys /scores filters and pages on
+            cursor.execute("ALTER TABLE resume_analysis ADD COLUMN IF NOT EXISTS jd_uuid TEXT;")
+
+            # One row per resume per JD. The original key was the resume id
+            # alone, so scoring a resume against a second JD overwrote the first
+            # result. Rows saved without a JD share the '' key.
+            cursor.execute("ALTER TABLE resume_analysis DROP CONSTRAINT IF EXISTS resume_analysis_id_key;")
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_resume_analysis_id_jd
+                ON resume_analysis (id, (COALESCE(jd_uuid, '')));
+            """)
+
+            # /scores pages on (final_score, id, jd_uuid); the same resume can
+            # hold one score per JD, so id alone does not break ties
+            cursor.execute("DROP INDEX IF EXISTS ix_resume_analysis_score;")
+            cursor.execute("DROP INDEX IF EXISTS ix_resume_analysis_jd_score;")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_resume_analysis_score_jd
+                ON resume_analysis (final_score DESC, id DESC, jd_uuid DESC NULLS LAST);
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_resume_analysis_jd_score_id
+                ON resume_analysis (jd_uuid, final_score DESC, id DESC);
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS ix_resume_analysis_name ON resume_analysis (name);")
+
+            # Change feed for /get_resume_delta/: every insert or update takes the
+            # next seq, so "seq > cursor" is exactly the rows changed since then
+            cursor.execute("ALTER TABLE resume_analysis ADD COLUMN IF NOT EXISTS seq BIGSERIAL;")
+            cursor.execute("ALTER TABLE resume_analysis ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();")
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_resume_analysis_seq ON resume_analysis (seq);")
+
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS resume_parse_errors (
-                    filename TEXT PRIMARY KEY,
+                    filename TEXT,
                     raw_error TEXT,
                     retry_count INT DEFAULT 0
                 );
             """)
+            # Each failure keeps what retry_worker.py needs to run it again, and
+            # when to try next (exponential backoff per item)
+            for column in ("jd_path TEXT", "resume_path TEXT", "resume_uuid TEXT", "jd_uuid TEXT",
+                           "next_attempt_at TIMESTAMPTZ DEFAULT now()"):
+                cursor.execute(f"ALTER TABLE resume_parse_errors ADD COLUMN IF NOT EXISTS {column};")
+            # A failure is one resume against one JD; the base name alone (the
+            # original key) collides across JDs and upload folders
+            cursor.execute("ALTER TABLE resume_parse_errors DROP CONSTRAINT IF EXISTS resume_parse_errors_pkey;")
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_resume_parse_errors_target
+                ON resume_parse_errors (resume_path, jd_path);
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_resume_parse_errors_due
+                ON resume_parse_errors (next_attempt_at) WHERE resume_path IS NOT NULL;
+            """)
 
             conn.commit()
             cursor.close()
-            conn.close()
-        except Exception as e:
-            print("DB Init Error:", e)
+    except Exception as e:
+        print("DB Init Error:", e)
+
+    # Trigram index for the /scores skill filter (ILIKE '%skill%'). pg_trgm may
+    # not be installable by this role; the filter still works without it.
+    try:
+        with raw_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS ix_resume_analysis_skills_trgm
+                ON resume_analysis USING gin (technical_skills gin_trgm_ops);
+            """)
+            conn.commit()
+            cursor.close()
+    except Exception as e:
+        print("DB Init Error:", e)
+
+
+class ResumeMatcherCore:
+    def __init__(self):
+        if SCORING_MODE == "local":
+            self.llm = create_llm(system_prompt=scoring.FACTS_PROMPT)
+        elif SCORING_MODE == "profile":
+            self.llm = create_llm(system_prompt=profiles.PROFILE_PROMPT)
+        elif STRUCTURED_OUTPUT:
+            self.llm = create_llm(system_prompt=STRUCTURED_SYSTEM_PROMPT, response_model=schemas.ResumeEvaluation)
+        else:
+            self.llm = create_llm()
+        self.init_db()
+
+    # The crewai agents are not used by the scoring path; build them (and import
+    # crewai, which is slow to load) only when something asks for them
+    @cached_property
+    def job_parser_agent(self):
+        from crewai import Agent
+
+        return Agent(
+            role="JobParser",
+            goal="Extract key requirements and structured info from the job description.",
+            backstory="Expert in job analysis and recruitment strategy.",
+            llm=self.llm
+        )
+
+    @cached_property
+    def resume_analyzer_agent(self):
+        from crewai import Agent
+
+        return Agent(
+            role="ResumeAnalyzer",
+            goal="Evaluate resumes against job description using transparent scoring per system prompt.",
+            backstory="Expert in resume parsing and hiring best practices.",
+            llm=self.llm
+        )
+
+    def init_db(self):
+        ensure_analysis_schema()
+        if SCORING_MODE == "profile":
+            try:
+                profiles.ensure_profile_table()
+            except Exception as e:
+                print("DB Init Error:", e)
 
     def fix_json_issues(self, raw_str: str) -> str:
         raw_str = raw_str.strip()
@@ -103,85 +239,194 @@ class ResumeMatcherCore:
 
         return raw_str
 
-    def insert_into_db(self, result):
+    def repair_json(self, prompt, raw, llm=None):
+        """Recover a parsed evaluation from malformed model output, or return None.
+
+        Sections that parsed are kept as they are; the missing ones are requested
+        in one follow-up call to the same model and merged in.
+        """
+        sections = FACTS_SECTIONS if SCORING_MODE == "local" else OUTPUT_SECTIONS
+        data, incomplete = json_repair.salvage_json(raw)
+        missing = json_repair.missing_sections(data, incomplete, sections)
+        if not missing:
+            return data
+        if len(missing) == len(sections):
+            return None  # nothing worth keeping; the full retry redoes it
+
+        for path in missing:
+            json_repair.pop_path(data, path)  # drop what was cut off part-way
+
+        # Free-form reply: the response schema would make the model redo every section
+        llm = (llm or self.llm).model_copy(update={"response_model": None})
+        follow_up = (
+            f"{prompt}\n\n"
+            f"{self.output_format(llm)}"
+            "Your previous answer was not valid JSON. These parts of it were recovered and are final:\n"
+            f"{json.dumps(data)}\n"
+            f"Return only a JSON object with the missing parts, nested as in the output format: {', '.join(missing)}."
+        )
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
-            data = result.get("score_data", {})
-            name = data.get("name", "")
-            email = data.get("email", "")
-            contact_no = data.get("contact no", "")  # Note the space in the key
-            record_id = result.get("uuid","")
-            score = data.get("score", {})
-            components = score.get("components", {})
-            row = (
-                record_id,
-                name,
-                email,
-                contact_no,
-                score.get("value", 0.0),
-                components.get("technical_skills", {}).get("score", 0.0),
-                ", ".join(skill.get("skill", "") if isinstance(skill, dict) else str(skill)
-                        for skill in components.get("technical_skills", {}).get("matched", [])),
-                components.get("experience", {}).get("score", 0.0),
-                components.get("experience", {}).get("field", ""),
-                components.get("education", {}).get("score", 0.0),
-                components.get("education", {}).get("degree", ""),
-                components.get("soft_skills", {}).get("score", 0.0),
-                ", ".join(skill.get("skill", "") if isinstance(skill, dict) else str(skill)
-                        for skill in components.get("soft_skills", {}).get("matched", [])),
-                components.get("certifications", {}).get("score", 0.0),
-                ", ".join(cert.get("name", "") if isinstance(cert, dict) else str(cert)
-                        for cert in components.get("certifications", {}).get("items", [])),
-                ", ".join(data.get("analysis", {}).get("strengths", [])),
-                ", ".join(data.get("analysis", {}).get("weaknesses", [])),
-                ", ".join(data.get("analysis", {}).get("suggestions", [])),
-            )
+            reply, reply_incomplete = json_repair.salvage_json(self.fix_json_issues(llm._call(follow_up)))
+        except Exception as e:
+            print("JSON Repair Error:", e)
+            return None
 
-            cursor.execute("""
-                INSERT INTO resume_analysis (
-                    id, name, email, contact_no, final_score, 
-                    technical_skills_score, technical_skills,
-                    experience_score, experience, education_score, education,
-                    soft_skills_score, soft_skills, certifications_score, certifications,
-                    strengths, weaknesses, suggestions
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-            """, row)
+        for path in missing:
+            # Models often answer with the section by its own name at the top level
+            for candidate in (path, path.rsplit(".", 1)[-1]):
+                value = json_repair.get_path(reply, candidate)
+                if value is not None and candidate not in reply_incomplete:
+                    break
+            else:
+                return None
+            json_repair.set_path(data, path, value)
+        return data
 
-            cursor.execute("DELETE FROM resume_parse_errors WHERE filename = %s;", (result["filename"],))
+    def insert_into_db(self, result, jd_uuid=None, resume_file=None, jd_file=None):
+        try:
+            with raw_connection() as conn:
+                cursor = conn.cursor()
+                data = result.get("score_data", {})
+                name = data.get("name", "")
+                email = data.get("email", "")
+                contact_no = data.get("contact no", "")  # Note the space in the key
+                record_id = result.get("uuid","")
+                score = data.get("score", {})
+                components = score.get("components", {})
+                row = (
+                    record_id,
+                    name,
+                    email,
+                    contact_no,
+                    score.get("value", 0.0),
+                    components.get("technical_skills", {}).get("score", 0.0),
+                    ", ".join(skill.get("skill", "") if isinstance(skill, dict) else str(skill)
+                            for skill in components.get("technical_skills", {}).get("matched", [])),
+                    components.get("experience", {}).get("score", 0.0),
+                    components.get("experience", {}).get("field", ""),
+                    components.get("education", {}).get("score", 0.0),
+                    components.get("education", {}).get("degree", ""),
+                    components.get("soft_skills", {}).get("score", 0.0),
+                    ", ".join(skill.get("skill", "") if isinstance(skill, dict) else str(skill)
+                            for skill in components.get("soft_skills", {}).get("matched", [])),
+                    components.get("certifications", {}).get("score", 0.0),
+                    ", ".join(cert.get("name", "") if isinstance(cert, dict) else str(cert)
+                            for cert in components.get("certifications", {}).get("items", [])),
+                    ", ".join(data.get("analysis", {}).get("strengths", [])),
+                    ", ".join(data.get("analysis", {}).get("weaknesses", [])),
+                    ", ".join(data.get("analysis", {}).get("suggestions", [])),
+                )
 
-            conn.commit()
-            cursor.close()
-            conn.close()
+                # Serialise writers so rows commit in seq order; otherwise a feed
+                # reader could move its cursor past a seq that commits later
+                cursor.execute("SELECT pg_advisory_xact_lock(%s);", (ANALYSIS_FEED_LOCK,))
+                cursor.execute("""
+                    INSERT INTO resume_analysis (
+                        id, name, email, contact_no, final_score, 
+                        technical_skills_score, technical_skills,
+                        experience_score, experience, education_score, education,
+                        soft_skills_score, soft_skills, certifications_score, certifications,
+                        strengths, weaknesses, suggestions, jd_uuid
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (id, (COALESCE(jd_uuid, ''))) DO UPDATE SET
+                        name = EXCLUDED.name, email = EXCLUDED.email, contact_no = EXCLUDED.contact_no,
+                        final_score = EXCLUDED.final_score,
+                        technical_skills_score = EXCLUDED.technical_skills_score,
+                        technical_skills = EXCLUDED.technical_skills,
+                        experience_score = EXCLUDED.experience_score, experience = EXCLUDED.experience,
+                        education_score = EXCLUDED.education_score, education = EXCLUDED.education,
+                        soft_skills_score = EXCLUDED.soft_skills_score, soft_skills = EXCLUDED.soft_skills,
+                        certifications_score = EXCLUDED.certifications_score,
+                        certifications = EXCLUDED.certifications,
+                        strengths = EXCLUDED.strengths, weaknesses = EXCLUDED.weaknesses,
+                        suggestions = EXCLUDED.suggestions,
+                        seq = nextval(pg_get_serial_sequence('resume_analysis', 'seq')),
+                        updated_at = now();
+                """, row + (jd_uuid,))
+
+                if resume_file and jd_file:
+                    cursor.execute(
+                        "DELETE FROM resume_parse_errors WHERE resume_path = %s AND jd_path = %s;",
+                        (resume_file, jd_file)
+                    )
+
+                conn.commit()
+                cursor.close()
         except Exception as e:
             print("DB Insert Error:", e)
 
-    def log_parse_error(self, filename, raw):
+    def log_parse_error(self, jd_file, resume_file, raw, uuid=None, jd_uuid=None):
         try:
-            conn = psycopg2.connect(**self.db_config)
-            cursor = conn.cursor()
+            with raw_connection() as conn:
+                cursor = conn.cursor()
 
-            cursor.execute("""
-                INSERT INTO resume_parse_errors (filename, raw_error, retry_count)
-                VALUES (%s, %s, 1)
-                ON CONFLICT (filename) DO UPDATE SET
-                    raw_error = EXCLUDED.raw_error,
-                    retry_count = resume_parse_errors.retry_count + 1;
-            """, (filename, raw[:2000]))
+                # The n-th failure is retried RETRY_BACKOFF_BASE * 2^(n-1) seconds
+                # later (capped); the NOTIFY wakes the retry scheduler on commit
+                cursor.execute("""
+                    INSERT INTO resume_parse_errors
+                        (filename, raw_error, retry_count, jd_path, resume_path, resume_uuid, jd_uuid, next_attempt_at)
+                    VALUES (%(filename)s, %(raw)s, 1, %(jd_path)s, %(resume_path)s, %(resume_uuid)s, %(jd_uuid)s,
+                            now() + make_interval(secs => %(base)s))
+                    ON CONFLICT (resume_path, jd_path) DO UPDATE SET
+                        raw_error = EXCLUDED.raw_error,
+                        retry_count = resume_parse_errors.retry_count + 1,
+                        resume_uuid = COALESCE(EXCLUDED.resume_uuid, resume_parse_errors.resume_uuid),
+                        jd_uuid = COALESCE(EXCLUDED.jd_uuid, resume_parse_errors.jd_uuid),
+                        next_attempt_at = now() + make_interval(
+                            secs => LEAST(%(base)s * power(2, resume_parse_errors.retry_count), %(max)s)
+                        );
+                """, {
+                    "filename": os.path.basename(resume_file),
+                    "raw": (raw or "")[:2000],
+                    "jd_path": jd_file,
+                    "resume_path": resume_file,
+                    "resume_uuid": str(uuid) if uuid is not None else None,
+                    "jd_uuid": str(jd_uuid) if jd_uuid is not None else None,
+                    "base": RETRY_BACKOFF_BASE,
+                    "max": RETRY_BACKOFF_MAX,
+                })
+                cursor.execute("SELECT pg_notify(%s, %s);", (RETRY_CHANNEL, resume_file))
 
-            conn.commit()
-            cursor.close()
-            conn.close()
+                conn.commit()
+                cursor.close()
         except Exception as e:
             print("Error Logging Failed:", e)
 
-    def run_single(self, jd_file, resume_file,uuid):
-        job_text = extract_text(jd_file)
-        resume_text = extract_text(resume_file)
+    def jd_requirements(self, jd):
+        requirements = ""
+        if jd.required_skills:
+            requirements += f"Required skills: {', '.join(jd.required_skills)} "
+        if jd.optional_skills:
+            requirements += f"Optional skills: {', '.join(jd.optional_skills)} "
+        return requirements
+
+    def jd_context(self, jd):
+        """The JD part of the prompt, shared by every resume in a batch."""
+        if SCORING_MODE == "local":
+            return f"Job Description: {jd.text} {self.jd_requirements(jd)}"
+        return f"Job Description: {jd.text} "
+
+    def build_prompt(self, jd, resume_text, include_jd=True):
+        # include_jd is False when the JD is already in the provider context cache
+        context = self.jd_context(jd) if include_jd else ""
+        if SCORING_MODE == "local":
+            return (
+                f"{context}"
+                f"Candidate Resume: {resume_text} "
+                "Return only the JSON object of facts described in the system prompt."
+            )
 
-        prompt = (
+        if STRUCTURED_OUTPUT:
+            # The response schema fixes the shape of the JSON reply
+            return (
+                f"{context}"
+                f"Candidate Resume: {resume_text} "
+                "Analyze and score this candidate as per the criteria in the system prompt, as JSON."
+            )
+
+        return (
            "SYSTEM PROMPT: Use the system prompt embedded in GroqLLM. "
-            f"Job Description: {job_text} "
+            f"{context}"
             f"Candidate Resume: {resume_text} "
             "Ensure the JSON output does not contain escaped characters like \\n, \\\\, or \\/. "
             "The response must be plain, readable JSON with standard characters only. "
@@ -199,9 +444,121 @@ class ResumeMatcherCore:
         
         )
 
+    def output_format(self, llm):
+        """The reply template for free-form prompts when ``llm``'s system prompt leaves it out."""
+        if llm.system_prompt != STRUCTURED_SYSTEM_PROMPT:
+            return ""
+        return f"{OUTPUT_FORMAT}\n\n"
+
+    def build_packed_prompt(self, jd, resume_texts, include_jd=True):
+        """Prompt evaluating several resumes against one JD; ``resume_texts`` maps resume id to text."""
+        resumes = "".join(
+            f"=== Resume {resume_id} === {text} " for resume_id, text in resume_texts.items()
+        )
+        return (
+            "SYSTEM PROMPT: Use the system prompt embedded in GroqLLM. "
+            f"{self.jd_context(jd) if include_jd else ''}"
+            f"Candidate Resumes: {resumes}"
+            f"{self.output_format(self.llm)}"
+            "Evaluate each resume on its own against the job description, as per the system prompt. "
+            "Return a JSON array with one object per resume, in the order given. "
+            "Each object must have exactly the output format (8. OUTPUT FORMAT), "
+            "plus a \"resume_id\" field holding the resume's id (e.g. \"R1\"). "
+            "Ensure the JSON output does not contain escaped characters like \\n, \\\\, or \\/. "
+            "Do not include markdown formatting or any text before or after the JSON array. "
+            "Return only the JSON array."
+        )
+
+    def cache_key(self, jd, resume_text):
+        return evaluation_key(
+            jd.text, resume_text, self.llm.model, self.llm.temperature, self.llm.prompt_hash
+        )
+
+    def validate_output(self, parsed, llm=None):
+        """Check ``parsed`` against the LLM's response model; raises pydantic.ValidationError."""
+        response_model = (llm or self.llm).response_model
+        if response_model is None:
+            return parsed
+        return response_model.model_validate(parsed).model_dump(by_alias=True)
+
+    def to_score_data(self, parsed):
+        """Turn the parsed model output into score_data (computing scores locally in "local" mode)."""
+        if SCORING_MODE == "local":
+            return scoring.score_candidate(parsed)
+        return parsed
+
+    def get_resume_profile(self, resume_text, uuid):
+        """Return the stored profile for this resume text, extracting it with the LLM on first use."""
+        text_hash = sha256_text(resume_text)
+        profile = profiles.load_profile(text_hash, self.llm.prompt_hash)
+        if profile is None:
+            llm_response = self.llm._call(f"Candidate Resume: {resume_text} Return only the JSON object.")
+            profile = json.loads(self.fix_json_issues(llm_response))
+            profiles.save_profile(text_hash, uuid, self.llm.prompt_hash, profile)
+        return profile
+
+    def run_profile_match(self, jd, resume_file, resume_text, uuid, jd_uuid=None, jd_file=None):
         try:
-            llm_response = self.llm._call(prompt)
+            profile = self.get_resume_profile(resume_text, uuid)
+        except json.JSONDecodeError as e:
+            raw_name = os.path.basename(resume_file)
+            self.log_parse_error(jd_file, resume_file, e.doc, uuid, jd_uuid)
+            return {
+                "filename": raw_name,
+                "score_data": {
+                    "error": "[ERROR] Could not parse JSON",
+                    "raw": e.doc
+                }
+            }
         except Exception as e:
+            self.log_parse_error(jd_file, resume_file, f"LLM call failed: {e}", uuid, jd_uuid)
+            return {
+                "filename": os.path.basename(resume_file),
+                "score_data": {
+                    "error": f"[ERROR] LLM call failed: {e}"
+                }
+            }
+
+        result = {
+            "filename": os.path.basename(resume_file),
+            "uuid": uuid,
+            "score_data": scoring.score_candidate(profiles.match_profile(profile, jd))
+        }
+        self.insert_into_db(result, jd_uuid, resume_file, jd_file)
+        return result
+
+    def run_single(self, jd_file, resume_file,uuid, jd_uuid=None, llm=None):
+        jd = prepare_jd(jd_file, jd_uuid)
+        resume_text = extract_text(resume_file)
+
+        if SCORING_MODE == "profile":
+            return self.run_profile_match(jd, resume_file, resume_text, uuid, jd_uuid, jd_file)
+
+        # Identical JD/resume text under the same model and prompt was already evaluated
+        llm = llm or self.llm
+        cache_key = self.cache_key(jd, resume_text)
+        cached = evaluation_cache.get(cache_key)
+        if cached is not None:
+            try:
+                # Entries cached without structured output were never validated
+                cached = self.validate_output(cached, llm)
+            except ValueError:
+                cached = None
+        if cached is not None:
+            result = {
+                "filename": os.path.basename(resume_file),
+                "uuid": uuid,
+                "score_data": self.to_score_data(cached)
+            }
+            self.insert_into_db(result, jd_uuid, resume_file, jd_file)
+            return result
+
+        prompt = self.build_prompt(jd, resume_text, include_jd=llm.cached_content is None)
+
+        try:
+            llm_response = llm._call(prompt)
+        except Exception as e:
+            self.log_parse_error(jd_file, resume_file, f"LLM call failed: {e}", uuid, jd_uuid)
             return {
                 "filename": os.path.basename(resume_file),
                 "score_data": {
@@ -212,17 +569,24 @@ class ResumeMatcherCore:
         fixed_raw = self.fix_json_issues(llm_response)
 
         try:
-            parsed = json.loads(fixed_raw)
+            try:
+                parsed = json.loads(fixed_raw)
+            except json.JSONDecodeError:
+                parsed = self.repair_json(prompt, fixed_raw, llm) if JSON_REPAIR else None
+                if parsed is None:
+                    raise
+            parsed = self.validate_output(parsed, llm)
             result = {
                 "filename": os.path.basename(resume_file),
                 "uuid":uuid,
-                "score_data": parsed
+                "score_data": self.to_score_data(parsed)
             }
-            self.insert_into_db(result)
+            evaluation_cache.put(cache_key, parsed)
+            self.insert_into_db(result, jd_uuid, resume_file, jd_file)
             return result
         except Exception as e:
             raw_name = os.path.basename(resume_file)
-            self.log_parse_error(raw_name, fixed_raw)
+            self.log_parse_error(jd_file, resume_file, fixed_raw, uuid, jd_uuid)
             return {
                 "filename": raw_name,
                 "score_data": {
@@ -231,24 +595,209 @@ class ResumeMatcherCore:
                 }
             }
 
-    def run_background_retry(self, jd_path, folder="uploads"):
-        def retry_loop():
-            print("Background retry thread started...")
-            while True:
-                try:
-                    conn = psycopg2.connect(**self.db_config)
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT filename FROM resume_parse_errors;")
-                    rows = cursor.fetchall()
-                    for (filename,) in rows:
-                        resume_path = os.path.join(folder, filename)
-                        if os.path.exists(resume_path):
-                            self.run_single(jd_path, resume_path)
-                    cursor.close()
-                    conn.close()
-                except Exception as e:
-                    print(f"Retry loop error: {e}")
-                time.sleep(60)  # Retry every 60 seconds
-
-        thread = threading.Thread(target=retry_loop, daemon=True)
-        thread.start()
\ No newline at end of file
+    def _prepare_batch(self, jd_file, resumes, jd_uuid=None, top_k=None, min_similarity=None):
+        # Parse every document on the extraction process pool first; run_single
+        # then reads the text straight from the cache. The JD is prepared once
+        # so the workers all reuse the same profile.
+        records = extraction_stage.extract_paths([resume_path for resume_path, _ in resumes])
+        extraction_stage.extract_paths([jd_file])
+        jd = prepare_jd(jd_file, jd_uuid)
+
+        # Optional embedding pre-filter: only the shortlist reaches the LLM
+        ranking = prefilter.rank(jd.text, [record["text"] for record in records], top_k, min_similarity)
+        if ranking is not None:
+            scores, keep = ranking
+            records = [
+                dict(record, prefilter_score=round(float(score), 4), shortlisted=bool(kept))
+                for record, score, kept in zip(records, scores, keep)
+            ]
+        return jd, records
+
+    @contextmanager
+    def _batch_llm(self, jd, size):
+        """The LLM to use for a batch: with GEMINI_CONTEXT_CACHE, one whose system prompt and JD are cached."""
+        if not GEMINI_CONTEXT_CACHE or SCORING_MODE == "profile" or size < 2:
+            yield self.llm
+            return
+        with self.llm.context_cache(self.jd_context(jd)) as llm:
+            yield llm or self.llm
+
+    def _score_item(self, jd_file, item, record, jd_uuid=None, llm=None):
+        resume_path, resume_uuid = item
+        if "error" in record:
+            return {
+                "filename": os.path.basename(resume_path),
+                "uuid": resume_uuid,
+                "score_data": {
+                    "error": f"[ERROR] {record['error']}"
+                }
+            }
+        if not record.get("shortlisted", True):
+            return {
+                "filename": os.path.basename(resume_path),
+                "uuid": resume_uuid,
+                "prefilter_score": record["prefilter_score"],
+                "shortlisted": False,
+                "score_data": {
+                    "skipped": "[SKIPPED] Below the pre-filter cutoff"
+                }
+            }
+
+        result = self.run_single(jd_file, resume_path, resume_uuid, jd_uuid=jd_uuid, llm=llm)
+        if "prefilter_score" in record:
+            result["prefilter_score"] = record["prefilter_score"]
+            result["shortlisted"] = True
+        return result
+
+    def run_batch(self, jd_file, resumes, max_workers=None, jd_uuid=None, top_k=None, min_similarity=None):
+        """Score a list of ``(resume_path, uuid)`` pairs against one JD concurrently.
+
+        Results are returned in the same order as ``resumes``. With ``top_k`` or
+        ``min_similarity`` only the embedding shortlist is sent to the LLM.
+        """
+        resumes = list(resumes)
+        if not resumes:
+            return []
+
+        jd, records = self._prepare_batch(jd_file, resumes, jd_uuid, top_k, min_similarity)
+        workers = min(max_workers or BATCH_MAX_WORKERS, len(resumes))
+        pending = sum(1 for record in records if "error" not in record and record.get("shortlisted", True))
+        with self._batch_llm(jd, pending) as llm:
+            if BATCH_PACK_SIZE > 1 and SCORING_MODE != "profile":
+                return self._run_packed(jd_file, jd, resumes, records, workers, jd_uuid, llm)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-batch") as pool:
+                return list(pool.map(
+                    lambda item, record: self._score_item(jd_file, item, record, jd_uuid, llm),
+                    resumes,
+                    records,
+                ))
+
+    def _pack(self, jd, pending):
+        """Split ``(index, item, text)`` entries into packs for build_packed_prompt."""
+        budget = BATCH_PACK_TOKEN_BUDGET - (len(self.llm.system_prompt) + len(jd.text)) // 4
+        packs, pack, used = [], [], 0
+        for entry in pending:
+            tokens = len(entry[2]) // 4
+            if pack and (len(pack) >= BATCH_PACK_SIZE or used + tokens > budget):
+                packs.append(pack)
+                pack, used = [], 0
+            pack.append(entry)
+            used += tokens
+        if pack:
+            packs.append(pack)
+        return packs
+
+    def _score_pack(self, jd_file, jd, pack, jd_uuid=None, llm=None):
+        """Evaluate one pack in a single request; resumes missing from the reply are retried alone."""
+        llm = llm or self.llm
+        texts = {f"R{n}": text for n, (_, _, text) in enumerate(pack, start=1)}
+        by_id = {}
+        if len(pack) > 1:
+            packed_llm = llm.model_copy(update={"max_output_tokens": BATCH_PACK_OUTPUT_TOKENS, "response_model": None})
+            prompt = self.build_packed_prompt(jd, texts, include_jd=llm.cached_content is None)
+            try:
+                parsed = json.loads(self.fix_json_issues(packed_llm._call(prompt)))
+                if isinstance(parsed, list):
+                    by_id = {
+                        str(entry.get("resume_id")): entry for entry in parsed if isinstance(entry, dict)
+                    }
+            except Exception as e:
+                print("Packed Evaluation Error:", e)
+
+        results = []
+        for resume_id, (_, (resume_path, resume_uuid), text) in zip(texts, pack):
+            entry = by_id.pop(resume_id, None)
+            if entry is None:
+                results.append(self.run_single(jd_file, resume_path, resume_uuid, jd_uuid=jd_uuid, llm=llm))
+                continue
+            entry.pop("resume_id", None)
+            try:
+                entry = self.validate_output(entry, llm)
+                score_data = self.to_score_data(entry)
+            except Exception as e:
+                print("Packed Evaluation Error:", e)
+                results.append(self.run_single(jd_file, resume_path, resume_uuid, jd_uuid=jd_uuid, llm=llm))
+                continue
+            evaluation_cache.put(self.cache_key(jd, text), entry)
+            result = {
+                "filename": os.path.basename(resume_path),
+                "uuid": resume_uuid,
+                "score_data": score_data
+            }
+            self.insert_into_db(result, jd_uuid, resume_path, jd_file)
+            results.append(result)
+        return results
+
+    def _run_packed(self, jd_file, jd, resumes, records, workers, jd_uuid=None, llm=None):
+        results = [None] * len(resumes)
+        pending = []
+        for index, (item, record) in enumerate(zip(resumes, records)):
+            if "error" in record or not record.get("shortlisted", True):
+                results[index] = self._score_item(jd_file, item, record, jd_uuid)
+            elif evaluation_cache.get(self.cache_key(jd, record["text"])) is not None:
+                # Cached resumes are answered by run_single without an LLM call
+                results[index] = self._score_item(jd_file, item, record, jd_uuid)
+            else:
+                pending.append((index, item, record["text"]))
+
+        packs = self._pack(jd, pending)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-batch") as pool:
+            for pack, pack_results in zip(packs, pool.map(lambda pack: self._score_pack(jd_file, jd, pack, jd_uuid, llm), packs)):
+                for (index, _, _), result in zip(pack, pack_results):
+                    record = records[index]
+                    if "prefilter_score" in record:
+                        result["prefilter_score"] = record["prefilter_score"]
+                        result["shortlisted"] = True
+                    results[index] = result
+        return results
+
+    def iter_batch(self, jd_file, resumes, max_workers=None, jd_uuid=None, top_k=None, min_similarity=None):
+        """Like run_batch, but yield ``((resume_path, uuid), result)`` as each resume finishes."""
+        resumes = list(resumes)
+        if not resumes:
+            return
+
+        jd, records = self._prepare_batch(jd_file, resumes, jd_uuid, top_k, min_similarity)
+        workers = min(max_workers or BATCH_MAX_WORKERS, len(resumes))
+        pending = sum(1 for record in records if "error" not in record and record.get("shortlisted", True))
+        with self._batch_llm(jd, pending) as llm:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resume-batch")
+            try:
+                futures = {
+                    pool.submit(self._score_item, jd_file, item, record, jd_uuid, llm): item
+                    for item, record in zip(resumes, records)
+                }
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                # A closed stream (e.g. client disconnect) drops the resumes not yet
+                # started. With a context cache, wait for the ones in flight first
+                # so the cache is not deleted under them.
+                pool.shutdown(wait=llm is not self.llm, cancel_futures=True)
+
+    def run(self, jd_file, folder):
+        resumes = [
+            (os.path.join(folder, name), str(uuid.uuid4()))
+            for name in sorted(os.listdir(folder))
+            if name.lower().endswith(RESUME_EXTENSIONS)
+        ]
+        return self.run_batch(jd_file, resumes)
+
+    def run_background_retry(self, max_workers=RETRY_WORKERS):
+        """Start the retry scheduler (see retry_worker.py) on a daemon thread and return it."""
+        scheduler = RetryScheduler(self, max_workers)
+        scheduler.start()
+        return scheduler
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """The process-wide ResumeMatcherCore, built on first use."""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = ResumeMatcherCore()
+        return _matcher
@@ -1,4 +1,5 @@
-from sqlalchemy import JSON, Column, ForeignKey, Integer, String, DateTime, LargeBinary
+from sqlalchemy import JSON, Column, ForeignKey, Index, Integer, String, DateTime, LargeBinary, Text, UniqueConstraint, inspect, select, text, update
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from database import Base
 import uuid
@@ -9,7 +10,8 @@ class PDFDocument(Base):
     id = Column(String, primary_key=True, index=True)
     filename = Column(String, index=True)
     content_type = Column(String)
-    file_data = Column(LargeBinary)
+    content_hash = Column(String, index=True)  # SHA-256 of the file in blob_store
+    file_data = deferred(Column(LargeBinary))  # legacy; moved to blob_store by ensure_schema
     file_size = Column(Integer)  # Size in bytes
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -20,13 +22,17 @@ class JobDescription(Base):
     id = Column(String, primary_key=True, index=True)
     title = Column(String, index=True)            # Optional: e.g., "Senior Backend Engineer"
     content_type = Column(String)
-    file_data = Column(LargeBinary)
+    content_hash = Column(String, index=True)  # SHA-256 of the file in blob_store
+    file_data = deferred(Column(LargeBinary))  # legacy; moved to blob_store by ensure_schema
     file_size = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class MatchLog(Base):
     __tablename__ = "match_logs"
+    __table_args__ = (
+        UniqueConstraint("jd_uuid", "resume_uuid", name="uq_match_logs_jd_resume"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     jd_uuid = Column(String, ForeignKey("job_descriptions.id"), nullable=False)
@@ -34,3 +40,91 @@ class MatchLog(Base):
     resume_filename = Column(String, nullable=False)
     score_data = Column(JSON, nullable=False)  # includes name, email, score, analysis etc.
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class EvaluationJob(Base):
+    __tablename__ = "evaluation_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    jd_uuid = Column(String, ForeignKey("job_descriptions.id"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class EvaluationJobItem(Base):
+    __tablename__ = "evaluation_job_items"
+    __table_args__ = (
+        Index("ix_evaluation_job_items_claim", "status", "locked_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String, ForeignKey("evaluation_jobs.id"), nullable=False, index=True)
+    resume_uuid = Column(String, ForeignKey("pdf_documents.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_by = Column(String)
+    locked_at = Column(DateTime(timezone=True))
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class ResumeProfile(Base):
+    __tablename__ = "resume_profiles"
+
+    # Keyed by the resume text hash so byte-identical uploads share one profile
+    text_hash = Column(String, primary_key=True)
+    resume_uuid = Column(String, index=True)
+    prompt_hash = Column(String, nullable=False)
+    profile = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+def ensure_schema(bind):
+    """Create missing tables, then apply the upgrades create_all does not make to existing ones."""
+    Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+
+    names = {ix["name"] for ix in inspector.get_indexes("match_logs")}
+    names |= {uc["name"] for uc in inspector.get_unique_constraints("match_logs")}
+    if "uq_match_logs_jd_resume" not in names:
+        with bind.begin() as conn:
+            # Keep the first log saved per (JD, resume) pair, as the old
+            # "skip later duplicates" insert did, so the unique index can be built
+            conn.execute(text("""
+                DELETE FROM match_logs WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY jd_uuid, resume_uuid ORDER BY created_at, id
+                        ) AS position
+                        FROM match_logs
+                    ) ranked
+                    WHERE position > 1
+                )
+            """))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX uq_match_logs_jd_resume ON match_logs (jd_uuid, resume_uuid)"
+            ))
+
+    for model in (PDFDocument, JobDescription):
+        table = model.__tablename__
+        if "content_hash" not in {column["name"] for column in inspector.get_columns(table)}:
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN content_hash VARCHAR"))
+                conn.execute(text(f"CREATE INDEX ix_{table}_content_hash ON {table} (content_hash)"))
+        _move_files_to_blob_store(bind, model.__table__)
+
+
+def _move_files_to_blob_store(bind, table):
+    """Copy file bytes still held in ``table`` into blob_store, one row at a time."""
+    from blob_store import blob_store
+
+    with bind.connect() as conn:
+        ids = conn.execute(
+            select(table.c.id).where(table.c.content_hash.is_(None), table.c.file_data.is_not(None))
+        ).scalars().all()
+    for row_id in ids:
+        with bind.begin() as conn:
+            content = conn.execute(select(table.c.file_data).where(table.c.id == row_id)).scalar()
+            conn.execute(
+                update(table).where(table.c.id == row_id)
+                .values(content_hash=blob_store.put_bytes(content), file_data=None)
+            )
@@ -0,0 +1,75 @@
+import os
+import threading
+
+import numpy as np
+
+# Local, CPU-only semantic pre-ranking. Only resumes that make the shortlist go
+# on to the (slow, paid) LLM evaluation.
+PREFILTER_MODEL = os.getenv("PREFILTER_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+PREFILTER_BATCH_SIZE = int(os.getenv("PREFILTER_BATCH_SIZE", "32"))
+PREFILTER_MAX_CHARS = int(os.getenv("PREFILTER_MAX_CHARS", "8000"))
+PREFILTER_TOP_K = int(os.getenv("PREFILTER_TOP_K", "0")) or None
+PREFILTER_MIN_SIMILARITY = (
+    float(os.getenv("PREFILTER_MIN_SIMILARITY")) if os.getenv("PREFILTER_MIN_SIMILARITY") else None
+)
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+
+            _model = SentenceTransformer(PREFILTER_MODEL, device="cpu")
+        return _model
+
+
+def embed_texts(texts):
+    """Embed ``texts`` into an (n, dim) float32 matrix of unit-length rows."""
+    texts = [text[:PREFILTER_MAX_CHARS] for text in texts]
+    embeddings = get_model().encode(
+        texts,
+        batch_size=PREFILTER_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def similarity_scores(jd_text, resume_texts):
+    """Cosine similarity of every resume to the JD, as a 1-D array."""
+    if not resume_texts:
+        return np.zeros(0, dtype=np.float32)
+    vectors = embed_texts([jd_text] + list(resume_texts))
+    return vectors[1:] @ vectors[0]
+
+
+def shortlist(scores, top_k=None, min_similarity=None):
+    """Boolean mask of the resumes worth sending to the LLM."""
+    scores = np.asarray(scores)
+    keep = np.ones(scores.shape[0], dtype=bool)
+    if min_similarity is not None:
+        keep &= scores >= min_similarity
+    if top_k is not None and keep.sum() > top_k:
+        ranked = np.argsort(-np.where(keep, scores, -np.inf), kind="stable")
+        keep[:] = False
+        keep[ranked[:top_k]] = True
+    return keep
+
+
+def rank(jd_text, resume_texts, top_k=None, min_similarity=None):
+    """Return ``(scores, keep_mask)``, or None when pre-filtering is disabled.
+
+    Unset arguments fall back to PREFILTER_TOP_K / PREFILTER_MIN_SIMILARITY.
+    """
+    top_k = top_k or PREFILTER_TOP_K
+    if min_similarity is None:
+        min_similarity = PREFILTER_MIN_SIMILARITY
+    if not top_k and min_similarity is None:
+        return None
+    scores = similarity_scores(jd_text, resume_texts)
+    return scores, shortlist(scores, top_k, min_similarity)
@@ -0,0 +1,223 @@
+import re
+
+import models
+from database import SessionLocal, engine
+
+# Two-phase matching. A resume is read by the LLM once (PROFILE_PROMPT) into a
+# compact structured profile stored in resume_profiles; matching it against any
+# JD afterwards is local (match_profile + scoring.py) and costs no tokens.
+
+PROFILE_PROMPT = """SYSTEM PROMPT:
+
+You are a resume parser. Extract a structured profile of the candidate from the resume below.
+Report only what the resume states; use empty strings, empty lists or false when absent.
+
+- "skills": every technical skill, tool, language, framework or platform named, one per item.
+- "soft_skills": at most five soft skills the resume demonstrates.
+- "employers": one entry per role; "months" is the duration of that role in months (0 if unknown).
+- "degrees[].level" is "phd", "masters", "bachelors", "associate" or "none";
+  "degrees[].tier" is 1 (top 1000 globally), 2 (nationally known) or 3 (other or unknown).
+- "grammar_issues" is true only if the resume has frequent spelling or grammar mistakes.
+
+Output a single JSON object, with no markdown and no text around it, in exactly this shape:
+
+{
+  "name": "first and last name",
+  "email": "email address",
+  "contact no": "contact number",
+  "skills": ["string"],
+  "soft_skills": ["string"],
+  "employers": [{"company": "string", "title": "string", "months": 0}],
+  "total_experience_years": 0,
+  "field": "main professional field",
+  "degrees": [{"degree": "string", "field": "string", "institution": "string", "level": "bachelors", "tier": 3}],
+  "certifications": ["string"],
+  "personal_projects": false,
+  "open_source": false,
+  "publications": false,
+  "grammar_issues": false
+}
+"""
+
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "gcp": "google cloud",
+    "aws": "amazon web services",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+}
+STOP_WORDS = {"and", "or", "of", "the", "in", "with", "a", "an", "to", "for", "skills", "tools", "systems", "basic"}
+LEVEL_RANK = {"phd": 4, "masters": 3, "bachelors": 2, "associate": 1, "none": 0}
+
+
+def ensure_profile_table():
+    # Not every entry point runs models.ensure_schema (main.py, retry_worker.py)
+    models.ResumeProfile.__table__.create(engine, checkfirst=True)
+
+
+def load_profile(text_hash, prompt_hash):
+    db = SessionLocal()
+    try:
+        row = db.get(models.ResumeProfile, text_hash)
+        if row is None or row.prompt_hash != prompt_hash:
+            return None
+        return row.profile
+    finally:
+        db.close()
+
+
+def save_profile(text_hash, resume_uuid, prompt_hash, profile):
+    db = SessionLocal()
+    try:
+        row = db.get(models.ResumeProfile, text_hash)
+        if row is None:
+            db.add(models.ResumeProfile(
+                text_hash=text_hash, resume_uuid=resume_uuid, prompt_hash=prompt_hash, profile=profile
+            ))
+        else:
+            row.resume_uuid, row.prompt_hash, row.profile = resume_uuid, prompt_hash, profile
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print("Profile Save Error:", e)
+    finally:
+        db.close()
+
+
+def normalize_skill(skill):
+    skill = re.sub(r"[^a-z0-9+#. ]", " ", str(skill).lower())
+    skill = re.sub(r"\s+", " ", skill).strip(" .")
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def _tokens(text):
+    return {t for t in re.findall(r"[a-z0-9+#]+(?:\.[a-z0-9]+)*", normalize_skill(text)) if t not in STOP_WORDS}
+
+
+def _leading_number(value):
+    # LLM values such as 18, "18.5" or "18 months"; anything else counts as 0
+    found = re.search(r"\d+(?:\.\d+)?", str(value or ""))
+    return float(found.group()) if found else 0.0
+
+
+def _match(skill, known, known_tokens):
+    name = normalize_skill(skill)
+    if name in known:
+        return "exact"
+    tokens = _tokens(skill)
+    for other, other_tokens in known_tokens:
+        if not tokens or not other_tokens:
+            continue
+        if len(tokens & other_tokens) / len(tokens | other_tokens) >= 0.5:
+            return "semantic"
+    return "missing"
+
+
+def match_profile(profile, jd):
+    """Build scoring.py facts for ``profile`` against a prepared JDProfile, locally."""
+    skills = [s for s in profile.get("skills") or [] if str(s).strip()]
+    known = {normalize_skill(s) for s in skills}
+    known_tokens = [(normalize_skill(s), _tokens(s)) for s in skills]
+
+    required, optional = jd.required_skills, jd.optional_skills
+    if not required and not optional:
+        # No requirement list could be parsed from the JD: fall back to the
+        # candidate's skills that the JD text mentions.
+        jd_text = f" {normalize_skill(jd.text)} "
+        required = [s for s in skills if f" {normalize_skill(s)} " in jd_text]
+
+    employers = profile.get("employers") or []
+    has_company = any(e.get("company") for e in employers if isinstance(e, dict))
+    months = sum(_leading_number(e.get("months")) for e in employers if isinstance(e, dict))
+    years = _leading_number(profile.get("total_experience_years")) or months / 12
+    if has_company and months:
+        evidence = "company_and_duration"
+    elif has_company:
+        evidence = "company_only"
+    elif years:
+        evidence = "duration_only"
+    else:
+        evidence = "none"
+
+    degrees = [d for d in profile.get("degrees") or [] if isinstance(d, dict)]
+    degree = max(degrees, key=lambda d: LEVEL_RANK.get(str(d.get("level", "none")).lower(), 0), default={})
+    jd_tokens = _tokens(jd.text)
+    degree_tokens = _tokens(degree.get("field", "") or degree.get("degree", ""))
+    if degree_tokens and jd.degree and degree_tokens & _tokens(jd.degree):
+        relevance = "direct"
+    elif degree_tokens & jd_tokens:
+        relevance = "loose"
+    else:
+        relevance = "low"
+
+    skill_tokens = set().union(*(_tokens(s) for s in list(required) + list(optional))) if (required or optional) else set()
+    certifications = []
+    for name in profile.get("certifications") or []:
+        cert_tokens = _tokens(name)
+        if cert_tokens & skill_tokens:
+            certifications.append({"name": name, "relevance": "aligned"})
+        elif cert_tokens & jd_tokens:
+            certifications.append({"name": name, "relevance": "moderate"})
+        else:
+            certifications.append({"name": name, "relevance": "irrelevant"})
+
+    required_facts = [{"skill": s, "match": _match(s, known, known_tokens)} for s in required]
+    optional_facts = [{"skill": s, "match": _match(s, known, known_tokens)} for s in optional]
+    matched = [f["skill"] for f in required_facts + optional_facts if f["match"] != "missing"]
+    missing = [f["skill"] for f in required_facts if f["match"] == "missing"]
+
+    strengths = []
+    if matched:
+        strengths.append(f"Matches {len(matched)} of the job's skills: {', '.join(matched)}")
+    if years:
+        strengths.append(f"{years:g} years of experience")
+    weaknesses = [f"No evidence of required skill: {skill}" for skill in missing]
+    suggestions = [f"Highlight any experience with {skill}" for skill in missing]
+
+    return {
+        "name": profile.get("name", ""),
+        "email": profile.get("email", ""),
+        "contact no": profile.get("contact no", ""),
+        "required_skills": required_facts,
+        "optional_skills": optional_facts,
+        "false_claims": 0,
+        "experience": {
+            "years": round(years, 1),
+            "field": profile.get("field", ""),
+            "company": next((e.get("company") for e in employers if isinstance(e, dict) and e.get("company")), ""),
+            "evidence": evidence,
+        },
+        "soft_skills": list(profile.get("soft_skills") or [])[:5],
+        "education": {
+            "degree": ", ".join(filter(None, [degree.get("degree", ""), degree.get("institution", "")])),
+            "level": degree.get("level", "none"),
+            "tier": degree.get("tier", 3),
+            "relevance": relevance,
+        },
+        "certifications": certifications,
+        "red_flags": {
+            "falsified_education": False,
+            "location_mismatch": False,
+            "weak_optional_skills": bool(optional_facts) and all(f["match"] == "missing" for f in optional_facts),
+            "grammar_issues": bool(profile.get("grammar_issues")),
+        },
+        "bonus": {
+            "personal_projects": bool(profile.get("personal_projects")),
+            "open_source": bool(profile.get("open_source")),
+            "publications": bool(profile.get("publications")),
+        },
+        "analysis": {"strengths": strengths, "weaknesses": weaknesses, "suggestions": suggestions},
+    }
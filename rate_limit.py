@@ -0,0 +1,103 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``.
+
+    ``reserve`` always takes the tokens and returns how long the caller must
+    wait for them, so concurrent callers queue up in arrival order instead of
+    polling.
+    """
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount, now):
+        amount = min(float(amount), self.capacity)
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class AdaptiveRateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared by a whole process.
+
+    A 429 from the provider pauses every caller for the ``Retry-After`` window
+    and cuts the request rate; each success then recovers it gradually back to
+    the configured ceiling.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, min_fraction=0.1):
+        self.max_rpm = float(requests_per_minute)
+        self.min_rpm = max(1.0, self.max_rpm * min_fraction)
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        now = time.monotonic()
+        with self._lock:
+            return max(
+                self.blocked_until - now,
+                self.requests.reserve(1, now),
+                self.tokens.reserve(tokens, now),
+                0.0,
+            )
+
+    def acquire(self, tokens=1):
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens=1):
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def _set_rpm(self, rpm):
+        self.requests.rate = rpm / 60.0
+
+    def throttle(self, delay):
+        """Back off after a rate-limit response from the provider."""
+        now = time.monotonic()
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self._set_rpm(max(self.min_rpm, self.requests.rate * 60.0 * 0.75))
+
+    def record_success(self):
+        with self._lock:
+            rpm = self.requests.rate * 60.0
+            if rpm < self.max_rpm:
+                self._set_rpm(min(self.max_rpm, rpm + self.max_rpm / 20.0))
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with jitter: a random point in the upper half of the window."""
+    window = min(cap, base * (2 ** attempt))
+    return random.uniform(window / 2, window)
+
+
+def retry_after_seconds(headers):
+    """Parse a ``Retry-After`` header given either as seconds or as an HTTP date."""
+    value = (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
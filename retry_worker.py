@@ -0,0 +1,151 @@
+"""Retry scheduler for failed evaluations.
+
+Every failure recorded by ResumeMatcherCore.log_parse_error carries its JD,
+resume and uuid, plus the time of its next attempt (exponential backoff, at
+most RETRY_MAX_ATTEMPTS attempts). The scheduler sleeps until the next attempt
+is due or a new failure is announced on the RETRY_CHANNEL notification
+channel, and retries due items concurrently. Run it on its own
+(``python retry_worker.py``) or inside a process with
+ResumeMatcherCore.run_background_retry().
+"""
+import argparse
+import os
+import select
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import engine, raw_connection
+
+RETRY_CHANNEL = "resume_retry"
+RETRY_WORKERS = int(os.getenv("RETRY_WORKERS", "4"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "5"))
+RETRY_BACKOFF_BASE = float(os.getenv("RETRY_BACKOFF_BASE", "5"))
+RETRY_BACKOFF_MAX = float(os.getenv("RETRY_BACKOFF_MAX", "600"))
+# A claimed item is not handed out again for this long, so a crashed
+# scheduler's items are picked up by another one eventually
+RETRY_LEASE_SECONDS = int(os.getenv("RETRY_LEASE_SECONDS", "900"))
+# Upper bound on the sleep between checks, in case a notification is missed
+RETRY_MAX_WAIT = float(os.getenv("RETRY_MAX_WAIT", "60"))
+
+
+class RetryScheduler:
+    def __init__(self, matcher, max_workers=RETRY_WORKERS):
+        self.matcher = matcher
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resume-retry")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wake_read, self._wake_write = os.pipe()
+        self._stopped = threading.Event()
+
+    def wake(self):
+        os.write(self._wake_write, b"x")
+
+    def stop(self):
+        self._stopped.set()
+        self.wake()
+
+    def start(self):
+        thread = threading.Thread(target=self.run_forever, name="resume-retry-scheduler", daemon=True)
+        thread.start()
+        return thread
+
+    def claim_due(self, limit):
+        with raw_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE resume_parse_errors
+                SET next_attempt_at = now() + make_interval(secs => %s)
+                WHERE (resume_path, jd_path) IN (
+                    SELECT resume_path, jd_path FROM resume_parse_errors
+                    WHERE resume_path IS NOT NULL AND jd_path IS NOT NULL AND retry_count < %s AND next_attempt_at <= now()
+                    ORDER BY next_attempt_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING jd_path, resume_path, resume_uuid, jd_uuid;
+            """, (RETRY_LEASE_SECONDS, RETRY_MAX_ATTEMPTS, limit))
+            rows = cursor.fetchall()
+            conn.commit()
+            cursor.close()
+        return rows
+
+    def seconds_until_due(self):
+        with raw_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT EXTRACT(EPOCH FROM MIN(next_attempt_at) - now())
+                FROM resume_parse_errors
+                WHERE resume_path IS NOT NULL AND jd_path IS NOT NULL AND retry_count < %s;
+            """, (RETRY_MAX_ATTEMPTS,))
+            (seconds,) = cursor.fetchone()
+            conn.rollback()
+            cursor.close()
+        if seconds is None:
+            return RETRY_MAX_WAIT
+        return min(max(float(seconds), 0.0), RETRY_MAX_WAIT)
+
+    def _retry(self, jd_path, resume_path, resume_uuid, jd_uuid):
+        try:
+            if os.path.exists(resume_path) and os.path.exists(jd_path):
+                # Success deletes the failure row; another failure reschedules it
+                self.matcher.run_single(jd_path, resume_path, resume_uuid, jd_uuid=jd_uuid)
+            else:
+                self.matcher.log_parse_error(
+                    jd_path, resume_path, f"Retry skipped: {resume_path} or {jd_path} is missing", resume_uuid, jd_uuid
+                )
+        except Exception as e:
+            print(f"Retry error: {e}")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self.wake()
+
+    def _dispatch(self):
+        with self._lock:
+            free = self.max_workers - self._in_flight
+        if free <= 0:
+            return
+        for row in self.claim_due(free):
+            with self._lock:
+                self._in_flight += 1
+            self._pool.submit(self._retry, *row)
+
+    def run_forever(self):
+        # LISTEN needs a connection of its own for the scheduler's lifetime
+        listener = engine.raw_connection()
+        listener.detach()
+        connection = listener.dbapi_connection
+        connection.autocommit = True
+        cursor = connection.cursor()
+        cursor.execute(f"LISTEN {RETRY_CHANNEL};")
+        print("Retry scheduler started...")
+
+        try:
+            while not self._stopped.is_set():
+                try:
+                    self._dispatch()
+                    timeout = self.seconds_until_due()
+                except Exception as e:
+                    print(f"Retry loop error: {e}")
+                    timeout = RETRY_MAX_WAIT
+
+                readable, _, _ = select.select([connection, self._wake_read], [], [], timeout)
+                if connection in readable:
+                    connection.poll()
+                    connection.notifies.clear()
+                if self._wake_read in readable:
+                    os.read(self._wake_read, 1024)
+        finally:
+            cursor.close()
+            listener.close()
+            self._pool.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    from matcher import get_matcher
+
+    parser = argparse.ArgumentParser(description="Retry failed resume evaluations as they become due.")
+    parser.add_argument("--workers", type=int, default=RETRY_WORKERS, help="retries run concurrently")
+    args = parser.parse_args()
+    RetryScheduler(get_matcher(), args.workers).run_forever()
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
  
  
 
@@ -14,6 +14,7 @@ class PDFDocumentCreate(PDFDocumentBase):
 class PDFDocument(PDFDocumentBase):
     id: str
     content_type: str
+    content_hash: Optional[str] = None
     file_size: int
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -30,6 +31,7 @@ class JobDescriptionCreate(JobDescriptionBase):
 class JobDescription(JobDescriptionBase):
     id: str
     content_type: str
+    content_hash: Optional[str] = None
     file_size: int
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -44,3 +46,96 @@ class MatchLogEntry(BaseModel):
     resume_uuid: str
     filename: str
     score_data: Dict
+
+
+class EvaluationJobCreate(BaseModel):
+    jd_uuid: str
+    resume_uuids: List[str]
+
+class EvaluationJobItem(BaseModel):
+    id: str
+    resume_uuid: str
+    position: int
+    status: str
+    attempts: int
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class EvaluationJob(BaseModel):
+    id: str
+    jd_uuid: str
+    status: str
+    counts: Dict[str, int]
+    created_at: Optional[datetime] = None
+
+
+# Model output in "llm" scoring mode (SYSTEM_PROMPT section 8). Sent to the
+# provider as the response schema and used to validate every reply.
+def _names(items):
+    # Older replies list skills as {"skill": ...} and certifications as {"name": ...}
+    return [item.get("skill") or item.get("name") or "" if isinstance(item, dict) else item for item in items or []]
+
+class TechnicalSkillsScore(BaseModel):
+    score: float = Field(0.0, ge=0, le=50)
+    matched: List[str] = []
+    missing: List[str] = []
+
+    _names = field_validator("matched", "missing", mode="before")(_names)
+
+class ExperienceScore(BaseModel):
+    score: float = Field(0.0, ge=0, le=20)
+    years: float = 0.0
+    field: str = ""
+    company: str = ""
+
+class EducationScore(BaseModel):
+    score: float = Field(0.0, ge=0, le=10)
+    degree: str = Field("", description="Degree together with the name of the university")
+
+class SoftSkillsScore(BaseModel):
+    score: float = Field(0.0, ge=0, le=10)
+    matched: List[str] = []
+
+    _names = field_validator("matched", mode="before")(_names)
+
+class CertificationsScore(BaseModel):
+    score: float = Field(0.0, ge=0, le=10)
+    items: List[str] = []
+
+    _names = field_validator("items", mode="before")(_names)
+
+class ScoreComponents(BaseModel):
+    technical_skills: TechnicalSkillsScore
+    experience: ExperienceScore
+    education: EducationScore
+    soft_skills: SoftSkillsScore
+    certifications: CertificationsScore
+
+class RedFlags(BaseModel):
+    critical: List[str] = []
+    moderate: List[str] = []
+    minor: List[str] = []
+
+class Score(BaseModel):
+    value: float = Field(ge=0, le=100)
+    components: ScoreComponents
+    red_flags: RedFlags = RedFlags()
+    bonus_points: float = 0.0
+
+class Analysis(BaseModel):
+    strengths: List[str] = []
+    weaknesses: List[str] = []
+    suggestions: List[str] = []
+
+class ResumeEvaluation(BaseModel):
+    name: str = Field(description="Only the first and last name of the candidate")
+    email: str = Field("", description="Email address of the candidate from the resume")
+    contact_no: str = Field("", alias="contact no", description="Contact number in the resume")
+    score: Score
+    analysis: Analysis
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,337 @@
+import json
+import os
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+# Deterministic implementation of the rubric in groq_llm.SYSTEM_PROMPT. The LLM
+# only extracts the facts below (FACTS_PROMPT); every point is computed here, so
+# scores are reproducible and can be recomputed for new weights without
+# another provider call.
+
+FACTS_PROMPT = """SYSTEM PROMPT:
+
+You are a resume fact extractor. Read the job description and the candidate resume and report
+only what the resume evidences. Do not compute any scores.
+
+Rules:
+- For every required and optional skill of the job, report "exact" if the resume names it,
+  "semantic" if it shows an equivalent or closely related skill, otherwise "missing".
+- "false_claims" counts skills claimed in the resume that the rest of the resume contradicts.
+- "experience.evidence" is "company_and_duration", "company_only", "duration_only" or "none",
+  depending on what the resume states for the relevant roles.
+- "education.level" is "phd", "masters", "bachelors", "associate" or "none".
+  "education.tier" is 1 (top 1000 globally), 2 (nationally known) or 3 (other or unknown).
+  "education.relevance" is "direct", "loose" or "low" with respect to the job.
+- "certifications[].relevance" is "aligned", "moderate" or "irrelevant" with respect to the job.
+- List at most the five most clearly demonstrated soft skills.
+
+Output a single JSON object, with no markdown and no text around it, in exactly this shape:
+
+{
+  "name": "first and last name",
+  "email": "email address",
+  "contact no": "contact number",
+  "required_skills": [{"skill": "string", "match": "exact|semantic|missing"}],
+  "optional_skills": [{"skill": "string", "match": "exact|semantic|missing"}],
+  "false_claims": 0,
+  "experience": {"years": 0, "field": "string", "company": "string", "evidence": "company_and_duration"},
+  "soft_skills": ["string"],
+  "education": {"degree": "degree and university", "level": "bachelors", "tier": 3, "relevance": "direct"},
+  "certifications": [{"name": "string", "relevance": "aligned|moderate|irrelevant"}],
+  "red_flags": {"falsified_education": false, "location_mismatch": false,
+                "weak_optional_skills": false, "grammar_issues": false},
+  "bonus": {"personal_projects": false, "open_source": false, "publications": false},
+  "analysis": {"strengths": ["string"], "weaknesses": ["string"], "suggestions": ["string"]}
+}
+"""
+
+EVIDENCE_LEVELS = ("company_and_duration", "company_only", "duration_only", "none")
+DEGREE_LEVELS = ("phd", "masters", "bachelors", "associate", "none")
+TIERS = (1, 2, 3)
+RELEVANCE_LEVELS = ("direct", "loose", "low")
+
+
+@dataclass
+class ScoringWeights:
+    """Point values of the rubric; change these and call score_matrix to rescore."""
+    required_exact: float = 3.5
+    required_semantic: float = 2.5
+    optional_exact: float = 1.5
+    optional_semantic: float = 1.0
+    missing_required: float = 7.0
+    false_claim: float = 10.0
+    technical_max: float = 50.0
+
+    points_per_year: float = 4.0
+    experience_max: float = 20.0
+    evidence_company_and_duration: float = 1.0
+    evidence_company_only: float = 0.85
+    evidence_duration_only: float = 0.9
+    evidence_none: float = 0.7
+
+    soft_skill_points: float = 2.0
+    soft_skills_counted: int = 5
+
+    degree_phd: float = 4.0
+    degree_masters: float = 4.0
+    degree_bachelors: float = 3.0
+    degree_associate: float = 2.0
+    cap_phd: float = 10.0
+    cap_masters: float = 10.0
+    cap_bachelors: float = 8.0
+    cap_associate: float = 5.0
+    tier_1: float = 2.5
+    tier_2: float = 2.0
+    tier_3: float = 1.5
+    relevance_direct: float = 3.0
+    relevance_loose: float = 1.5
+    relevance_low: float = 0.5
+
+    cert_aligned: float = 2.5
+    cert_aligned_counted: int = 4
+    cert_moderate: float = 1.5
+    certifications_max: float = 10.0
+
+    critical_penalty: float = 100.0
+    moderate_penalty: float = 25.0
+    minor_penalty: float = 10.0
+
+    bonus_projects: float = 2.0
+    bonus_open_source: float = 1.0
+    bonus_publications: float = 2.0
+    bonus_max: float = 5.0
+
+
+def _code(value, levels, default):
+    value = str(value).strip().lower() if value is not None else ""
+    for index, level in enumerate(levels):
+        if value == str(level):
+            return index
+    return levels.index(default)
+
+
+def _count(items, match):
+    return sum(1 for item in items or [] if isinstance(item, dict) and str(item.get("match", "")).lower() == match)
+
+
+class FactsMatrix:
+    """Column-per-fact numeric view of many candidates' extracted facts."""
+
+    COLUMNS = (
+        "required_exact", "required_semantic", "required_missing",
+        "optional_exact", "optional_semantic", "false_claims",
+        "years", "evidence", "soft_skills",
+        "degree", "tier", "relevance",
+        "certs_aligned", "certs_moderate",
+        "falsified_education", "location_mismatch", "weak_optional_skills", "grammar_issues",
+        "personal_projects", "open_source", "publications",
+    )
+
+    def __init__(self, data):
+        self.data = data
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def column(self, name):
+        return self.data[:, self.COLUMNS.index(name)]
+
+    @classmethod
+    def from_facts(cls, facts_list):
+        rows = []
+        for facts in facts_list:
+            experience = facts.get("experience") or {}
+            education = facts.get("education") or {}
+            certifications = facts.get("certifications") or []
+            red_flags = facts.get("red_flags") or {}
+            bonus = facts.get("bonus") or {}
+            try:
+                years = float(experience.get("years") or 0)
+            except (TypeError, ValueError):
+                years = 0.0
+            try:
+                tier = int(education.get("tier") or 3)
+            except (TypeError, ValueError):
+                tier = 3
+            rows.append((
+                _count(facts.get("required_skills"), "exact"),
+                _count(facts.get("required_skills"), "semantic"),
+                _count(facts.get("required_skills"), "missing"),
+                _count(facts.get("optional_skills"), "exact"),
+                _count(facts.get("optional_skills"), "semantic"),
+                float(facts.get("false_claims") or 0),
+                max(0.0, years),
+                _code(experience.get("evidence"), EVIDENCE_LEVELS, "none"),
+                len(facts.get("soft_skills") or []),
+                _code(education.get("level"), DEGREE_LEVELS, "none"),
+                _code(tier, TIERS, 3),
+                _code(education.get("relevance"), RELEVANCE_LEVELS, "low"),
+                sum(1 for c in certifications if isinstance(c, dict) and c.get("relevance") == "aligned"),
+                sum(1 for c in certifications if isinstance(c, dict) and c.get("relevance") == "moderate"),
+                bool(red_flags.get("falsified_education")),
+                bool(red_flags.get("location_mismatch")),
+                bool(red_flags.get("weak_optional_skills")),
+                bool(red_flags.get("grammar_issues")),
+                bool(bonus.get("personal_projects")),
+                bool(bonus.get("open_source")),
+                bool(bonus.get("publications")),
+            ))
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(cls.COLUMNS))
+        return cls(data)
+
+
+def score_matrix(matrix, weights=None):
+    """Score every candidate in ``matrix`` at once; returns a dict of 1-D arrays."""
+    w = weights or DEFAULT_WEIGHTS
+    col = matrix.column
+
+    technical = (
+        col("required_exact") * w.required_exact
+        + col("required_semantic") * w.required_semantic
+        + col("optional_exact") * w.optional_exact
+        + col("optional_semantic") * w.optional_semantic
+        - col("required_missing") * w.missing_required
+        - col("false_claims") * w.false_claim
+    )
+    technical = np.clip(technical, 0, w.technical_max)
+
+    evidence = np.array([
+        w.evidence_company_and_duration, w.evidence_company_only, w.evidence_duration_only, w.evidence_none,
+    ])[col("evidence").astype(int)]
+    experience = np.minimum(col("years") * w.points_per_year, w.experience_max) * evidence
+
+    soft_skills = np.minimum(col("soft_skills"), w.soft_skills_counted) * w.soft_skill_points
+
+    degree = col("degree").astype(int)
+    has_degree = degree != DEGREE_LEVELS.index("none")
+    degree_points = np.array([w.degree_phd, w.degree_masters, w.degree_bachelors, w.degree_associate, 0.0])[degree]
+    degree_caps = np.array([w.cap_phd, w.cap_masters, w.cap_bachelors, w.cap_associate, 0.0])[degree]
+    tier_points = np.array([w.tier_1, w.tier_2, w.tier_3])[col("tier").astype(int)]
+    relevance_points = np.array([w.relevance_direct, w.relevance_loose, w.relevance_low])[col("relevance").astype(int)]
+    education = np.where(has_degree, np.minimum(degree_points + tier_points + relevance_points, degree_caps), 0.0)
+
+    certifications = np.minimum(
+        np.minimum(col("certs_aligned"), w.cert_aligned_counted) * w.cert_aligned
+        + col("certs_moderate") * w.cert_moderate,
+        w.certifications_max,
+    )
+
+    missing = col("required_missing")
+    critical = (missing > 2) | (col("falsified_education") > 0)
+    moderate = ((missing >= 1) & (missing <= 2)).astype(float) + col("location_mismatch")
+    minor = col("weak_optional_skills") + col("grammar_issues")
+    penalties = (
+        critical * w.critical_penalty
+        + moderate * w.moderate_penalty
+        + minor * w.minor_penalty
+    )
+
+    bonus = np.minimum(
+        col("personal_projects") * w.bonus_projects
+        + col("open_source") * w.bonus_open_source
+        + col("publications") * w.bonus_publications,
+        w.bonus_max,
+    )
+
+    final = np.clip(technical + experience + soft_skills + education + certifications + bonus - penalties, 0, 100)
+    return {
+        "technical_skills": technical,
+        "experience": experience,
+        "soft_skills": soft_skills,
+        "education": education,
+        "certifications": certifications,
+        "bonus_points": bonus,
+        "penalties": penalties,
+        "final": final,
+    }
+
+
+def _red_flags(facts):
+    required = facts.get("required_skills") or []
+    missing = [s.get("skill", "") for s in required if isinstance(s, dict) and s.get("match") == "missing"]
+    flags = facts.get("red_flags") or {}
+    red_flags = {"critical": [], "moderate": [], "minor": []}
+    if len(missing) > 2:
+        red_flags["critical"].append(f"Missing {len(missing)} required skills: {', '.join(missing)}")
+    elif missing:
+        red_flags["moderate"].append(f"Missing required skill(s): {', '.join(missing)}")
+    if flags.get("falsified_education"):
+        red_flags["critical"].append("Falsified education")
+    if flags.get("location_mismatch"):
+        red_flags["moderate"].append("Location mismatch")
+    if flags.get("weak_optional_skills"):
+        red_flags["minor"].append("Weak optional skills")
+    if flags.get("grammar_issues"):
+        red_flags["minor"].append("Grammar issues")
+    return red_flags
+
+
+def build_score_data(facts, scores, index=0):
+    """Render one candidate in the SYSTEM_PROMPT output format used everywhere else."""
+    required = facts.get("required_skills") or []
+    optional = facts.get("optional_skills") or []
+    experience = facts.get("experience") or {}
+    education = facts.get("education") or {}
+    value = lambda name: round(float(scores[name][index]), 2)
+
+    return {
+        "name": facts.get("name", ""),
+        "email": facts.get("email", ""),
+        "contact no": facts.get("contact no", ""),
+        "score": {
+            "value": value("final"),
+            "components": {
+                "technical_skills": {
+                    "score": value("technical_skills"),
+                    "matched": [
+                        s.get("skill", "") for s in required + optional
+                        if isinstance(s, dict) and s.get("match") in ("exact", "semantic")
+                    ],
+                    "missing": [
+                        s.get("skill", "") for s in required
+                        if isinstance(s, dict) and s.get("match") == "missing"
+                    ],
+                },
+                "experience": {
+                    "score": value("experience"),
+                    "years": experience.get("years", 0),
+                    "field": experience.get("field", ""),
+                    "company": experience.get("company", ""),
+                },
+                "education": {"score": value("education"), "degree": education.get("degree", "")},
+                "soft_skills": {"score": value("soft_skills"), "matched": list(facts.get("soft_skills") or [])},
+                "certifications": {
+                    "score": value("certifications"),
+                    "items": [
+                        c.get("name", "") if isinstance(c, dict) else str(c)
+                        for c in facts.get("certifications") or []
+                    ],
+                },
+            },
+            "red_flags": _red_flags(facts),
+            "bonus_points": value("bonus_points"),
+        },
+        "analysis": facts.get("analysis") or {"strengths": [], "weaknesses": [], "suggestions": []},
+        "facts": facts,
+    }
+
+
+def weights_from_dict(values):
+    known = {f.name for f in fields(ScoringWeights)}
+    return ScoringWeights(**{k: v for k, v in (values or {}).items() if k in known})
+
+
+# Deployment-wide overrides, e.g. SCORING_WEIGHTS='{"points_per_year": 5}'
+DEFAULT_WEIGHTS = weights_from_dict(json.loads(os.getenv("SCORING_WEIGHTS") or "{}"))
+
+
+def score_candidate(facts, weights=None):
+    return build_score_data(facts, score_matrix(FactsMatrix.from_facts([facts]), weights))
+
+
+def rescore(score_data_list, weights=None):
+    """Recompute final scores for stored evaluations (those that kept their ``facts``)."""
+    facts_list = [data["facts"] for data in score_data_list]
+    scores = score_matrix(FactsMatrix.from_facts(facts_list), weights)
+    return [build_score_data(facts, scores, i) for i, facts in enumerate(facts_list)]
@@ -1,28 +1,101 @@
+import hashlib
+import io
 import os
 import re
-import pymupdf
-import docx
+import time
+import unicodedata
 import requests
- 
-def extract_text(file_path):
+from cache_store import CACHE_DIR, SQLiteCache
+
+# Normalized document text keyed by content hash, so the same resume or JD is
+# parsed once no matter how many times (or under how many names) it is uploaded.
+text_cache = SQLiteCache(
+    os.getenv("TEXT_CACHE_PATH", os.path.join(CACHE_DIR, "text.sqlite3")),
+    max_entries=int(os.getenv("TEXT_CACHE_MAX_ENTRIES", "20000")),
+)
 
+# Pages beyond this are ignored; resumes and JDs never need more, and it bounds
+# the cost of pathological uploads. 0 disables the limit.
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "30"))
+
+def document_kind(file_path):
     if file_path.endswith('.pdf'):
-        return extract_text_from_pdf(file_path)
+        return "pdf"
     elif file_path.endswith('.docx'):
-        return extract_text_from_docx(file_path)
+        return "docx"
     elif file_path.endswith('.txt'):
-        return extract_text_from_txt(file_path)
-    else:
+        return "txt"
+    return None
+
+def extract_text(file_path):
+    if document_kind(file_path) is None:
         return ""
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    return extract_document(content, file_path)["text"]
+
+def text_cache_key(content, kind):
+    return text_cache_key_for_hash(hashlib.sha256(content).hexdigest(), kind)
+
+def text_cache_key_for_hash(content_hash, kind):
+    return f"{kind}:{content_hash}"
+
+def extract_document(content, filename):
+    """Return ``{"text", "pages", "seconds"}`` for raw document bytes, parsing only on a cache miss."""
+    kind = document_kind(filename)
+    if kind is None:
+        return {"text": "", "pages": 0, "seconds": 0.0}
+
+    key = text_cache_key(content, kind)
+    record = text_cache.get(key)
+    if record is None:
+        record = parse_record(content, kind)
+        text_cache.put(key, record)
+    return record
+
+def parse_record(content, kind):
+    start = time.perf_counter()
+    text, pages = parse_document(content, kind)
+    return {
+        "text": normalize_text(text),
+        "pages": pages,
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+def parse_document(content, kind, max_pages=EXTRACT_MAX_PAGES):
+    """Parse document bytes into ``(text, page_count)``."""
+    # The parsers are imported on first use: they are slow to load and most
+    # processes importing this module (API, workers) parse on the extraction pool
+    if kind == "pdf":
+        import pymupdf
+
+        with pymupdf.open(stream=content, filetype="pdf") as doc:
+            last = min(doc.page_count, max_pages) if max_pages else doc.page_count
+            pages = [doc[i].get_text() for i in range(last)]
+            return "".join(pages), doc.page_count
+    elif kind == "docx":
+        import docx
+
+        doc = docx.Document(io.BytesIO(content))
+        return "\n".join(para.text for para in doc.paragraphs), 1
+    elif kind == "txt":
+        return content.decode('utf-8'), 1
+    return "", 0
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\x00", "")
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
 
 def extract_text_from_pdf(path):
-    doc = pymupdf.open(path)
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        return "".join(page.get_text() for page in doc)
  
 def extract_text_from_docx(path):
+    import docx
+
     doc = docx.Document(path)
     return "\n".join([para.text for para in doc.paragraphs])
 
@@ -0,0 +1,183 @@
+import fcntl
+import functools
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+import prefilter
+
+# On-disk index of resume embeddings: a raw float32 matrix that is memory-mapped
+# for search, plus the resume id of each row. Rows are unit length, so a dot
+# product is the cosine similarity.
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "index")
+
+
+class ResumeVectorIndex:
+    def __init__(self, directory=VECTOR_INDEX_DIR):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "resume_vectors.f32")
+        self.ids_path = os.path.join(directory, "resume_ids.json")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self._lock = threading.Lock()
+        self._loaded_stamp = None
+        self._matrix = None
+        self._ids = []
+        self._positions = {}
+
+    @contextmanager
+    def _file_lock(self):
+        # Serialises writers across API workers and worker processes
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_ids(self):
+        try:
+            with open(self.ids_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _read_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path, value):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+    def add_many(self, resume_ids, vectors):
+        """Insert or replace the embeddings for ``resume_ids``."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(resume_ids):
+            return
+        with self._file_lock():
+            meta = self._read_meta()
+            if meta is None:
+                meta = {"dim": int(vectors.shape[1]), "model": prefilter.PREFILTER_MODEL}
+                self._write_json(self.meta_path, meta)
+            elif meta["dim"] != vectors.shape[1] or meta["model"] != prefilter.PREFILTER_MODEL:
+                raise ValueError(
+                    f"Index at {self.directory} was built with {meta['model']} ({meta['dim']} dims); rebuild it"
+                )
+
+            ids = self._read_ids()
+            positions = {resume_id: row for row, resume_id in enumerate(ids)}
+            appended = []
+            open(self.vectors_path, "ab").close()  # create on first use
+            with open(self.vectors_path, "r+b") as f:
+                for resume_id, vector in zip(resume_ids, vectors):
+                    row = positions.get(resume_id)
+                    if row is None:
+                        appended.append(vector)
+                        positions[resume_id] = len(ids)
+                        ids.append(resume_id)
+                    else:
+                        f.seek(row * vector.nbytes)
+                        f.write(vector.tobytes())
+                if appended:
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.stack(appended).tobytes())
+            self._write_json(self.ids_path, ids)
+
+    def add(self, resume_id, vector):
+        self.add_many([resume_id], [vector])
+
+    def _refresh(self):
+        meta = self._read_meta()
+        if meta is None or not os.path.exists(self.vectors_path):
+            self._matrix, self._ids, self._positions = None, [], {}
+            return
+        stamp = (os.path.getmtime(self.ids_path), os.path.getsize(self.vectors_path))
+        if stamp == self._loaded_stamp:
+            return
+        ids = self._read_ids()
+        rows = min(len(ids), os.path.getsize(self.vectors_path) // (4 * meta["dim"]))
+        self._ids = ids[:rows]
+        self._positions = {resume_id: row for row, resume_id in enumerate(self._ids)}
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, meta["dim"]))
+            if rows else None
+        )
+        self._loaded_stamp = stamp
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._ids)
+
+    def __contains__(self, resume_id):
+        with self._lock:
+            self._refresh()
+            return resume_id in self._positions
+
+    def search(self, query_vector, top_n=20):
+        """Return ``[(resume_id, similarity), ...]`` for the ``top_n`` closest resumes."""
+        with self._lock:
+            self._refresh()
+            matrix, ids = self._matrix, self._ids
+        if matrix is None or top_n <= 0:
+            return []
+
+        scores = matrix @ np.asarray(query_vector, dtype=np.float32)
+        top_n = min(top_n, len(ids))
+        best = np.argpartition(-scores, top_n - 1)[:top_n]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(ids[row], round(float(scores[row]), 4)) for row in best]
+
+
+resume_index = ResumeVectorIndex()
+
+
+@functools.lru_cache(maxsize=256)
+def embed_query(text):
+    return prefilter.embed_texts([text])[0]
+
+
+def index_resume_texts(resume_ids, texts):
+    """Embed and store resumes; empty texts (failed extractions) are skipped."""
+    pairs = [(resume_id, text) for resume_id, text in zip(resume_ids, texts) if text.strip()]
+    if not pairs:
+        return
+    vectors = prefilter.embed_texts([text for _, text in pairs])
+    resume_index.add_many([resume_id for resume_id, _ in pairs], vectors)
+
+
+if __name__ == "__main__":
+    # Backfill: python vector_index.py embeds every stored resume not yet indexed
+    from blob_store import blob_store
+    from database import SessionLocal
+    from extraction import extraction_stage
+    import models
+
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            models.PDFDocument.id, models.PDFDocument.filename, models.PDFDocument.content_hash
+        ).all()
+        pending = [
+            row for row in rows
+            if row.id not in resume_index and row.content_hash and blob_store.exists(row.content_hash)
+        ]
+        for start in range(0, len(pending), prefilter.PREFILTER_BATCH_SIZE):
+            chunk = pending[start:start + prefilter.PREFILTER_BATCH_SIZE]
+            futures = [
+                extraction_stage.submit_file(blob_store.path(row.content_hash), row.filename, row.content_hash)
+                for row in chunk
+            ]
+            index_resume_texts([row.id for row in chunk], [extraction_stage.result(future)["text"] for future in futures])
+        print(f"Indexed {len(pending)} resumes ({len(resume_index)} total)")
+    finally:
+        db.close()
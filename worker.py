@@ -0,0 +1,85 @@
+"""Evaluation job worker.
+
+Run one or more of these alongside the API (``python worker.py``); each process
+leases queued items from the database, scores them and records the results.
+"""
+import argparse
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict
+
+import jobs
+import models
+from database import SessionLocal, engine
+from matcher import BATCH_MAX_WORKERS, get_matcher
+
+
+def process_items(matcher, db, items):
+    by_jd = defaultdict(list)
+    for item in items:
+        job = db.get(models.EvaluationJob, item.job_id)
+        by_jd[job.jd_uuid].append(item)
+
+    for jd_uuid, group in by_jd.items():
+        jd_path = jobs.materialize_jd(db, jd_uuid)
+        if jd_path is None:
+            for item in group:
+                jobs.fail_item(db, item, f"Job description {jd_uuid} not found")
+            continue
+
+        pending = []
+        for item in group:
+            resume_path = jobs.materialize_resume(db, item.resume_uuid)
+            if resume_path is None:
+                jobs.fail_item(db, item, f"Resume {item.resume_uuid} not found")
+            else:
+                pending.append((item, resume_path))
+        if not pending:
+            continue
+
+        results = matcher.run_batch(
+            jd_path,
+            [(resume_path, item.resume_uuid) for item, resume_path in pending],
+            jd_uuid=jd_uuid,
+        )
+        for (item, _), result in zip(pending, results):
+            score_data = result.get("score_data", {})
+            if "error" in score_data:
+                jobs.fail_item(db, item, score_data["error"])
+            else:
+                jobs.complete_item(db, item, score_data)
+
+
+def run_worker(batch_size, poll_interval):
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    matcher = get_matcher()
+    models.ensure_schema(engine)
+    print(f"Worker {worker_id} started")
+
+    while True:
+        db = SessionLocal()
+        try:
+            items = jobs.claim_items(db, worker_id, batch_size)
+            if items:
+                process_items(matcher, db, items)
+        except Exception as e:
+            db.rollback()
+            print(f"Worker error: {e}")
+            items = []
+        finally:
+            db.close()
+
+        if not items:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued resume evaluation jobs.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_MAX_WORKERS,
+                        help="items leased and scored together per round")
+    parser.add_argument("--poll-interval", type=float, default=float(os.getenv("JOB_POLL_INTERVAL", "2")),
+                        help="seconds to sleep when the queue is empty")
+    args = parser.parse_args()
+    run_worker(args.batch_size, args.poll_interval)